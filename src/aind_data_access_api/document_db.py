@@ -1,21 +1,114 @@
 """Module to interface with the DocumentDB"""
 
 import json
-import logging
+import math
 import warnings
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from functools import cached_property
-from sys import getsizeof
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple, Union
 
 import boto3
+import orjson
 import requests
 from botocore.auth import SigV4Auth
 from botocore.awsrequest import AWSRequest
+from pydantic import TypeAdapter
 from requests import Response
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from aind_data_access_api.models import DataAssetRecord
 from aind_data_access_api.utils import is_dict_corrupt
 
+# Validates a whole batch of records in a single call into pydantic-core
+_DATA_ASSET_RECORDS_ADAPTER = TypeAdapter(List[DataAssetRecord])
+
+# Max connections kept alive per host. Concurrent requests are capped at this
+# so that fan-outs reuse pooled connections instead of opening extra ones that
+# urllib3 discards after a single request.
+_POOL_MAXSIZE = 20
+
+# Client attributes the endpoint urls are built from, and the cached url
+# properties to drop when one of them is set
+_URL_ATTRIBUTES = frozenset(["host", "version", "database", "collection"])
+_URL_PROPERTIES = (
+    "_base_url",
+    "_aggregate_url",
+    "_update_one_url",
+    "_delete_one_url",
+    "_delete_many_url",
+    "_bulk_write_url",
+)
+
+# Datetimes are passed through to default=str so they keep the same
+# "YYYY-MM-DD HH:MM:SS" format that json.dumps(..., default=str) produced
+_ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def _has_non_finite_float(obj) -> bool:
+    """Check whether a json-like object holds a NaN or infinite float at any
+    depth."""
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, float):
+            if not math.isfinite(item):
+                return True
+        elif isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return False
+
+
+def _dumps(obj) -> bytes:
+    """Serialize an object to JSON bytes using orjson. orjson writes NaN and
+    infinite floats as null and rejects integers wider than 64 bits, so
+    those objects are serialized with json.dumps instead, which keeps them
+    as NaN, Infinity, or the full integer. A NaN can only have been dropped
+    if the output has a null in it, so other objects are not scanned."""
+    try:
+        data = orjson.dumps(obj, default=str, option=_ORJSON_OPTIONS)
+    except orjson.JSONEncodeError:
+        return json.dumps(obj, default=str).encode("utf-8")
+    if b"null" in data and _has_non_finite_float(obj):
+        return json.dumps(obj, default=str).encode("utf-8")
+    return data
+
+
+class _CachedSigV4Auth(SigV4Auth):
+    """SigV4Auth that reuses the derived signing key across requests instead
+    of recomputing its four chained HMACs for every signature. The key is
+    kept on the instance, so it goes away with the client that owns it."""
+
+    def __init__(self, credentials, service_name: str, region_name: str):
+        """Class constructor."""
+        super().__init__(credentials, service_name, region_name)
+        self._signing_key: Optional[Tuple[Tuple[str, str], bytes]] = None
+
+    def signature(self, string_to_sign: str, request: AWSRequest) -> str:
+        """Sign the string with the signing key. It is derived again when the
+        date or the access key changes, e.g. after credentials rotate."""
+        credentials = self.credentials
+        key_id = (request.context["timestamp"][0:8], credentials.access_key)
+        cached = self._signing_key
+        if cached is not None and cached[0] == key_id:
+            signing_key = cached[1]
+        else:
+            signing_key = f"AWS4{credentials.secret_key}".encode("utf-8")
+            for msg in (
+                key_id[0],
+                self._region_name,
+                self._service_name,
+                "aws4_request",
+            ):
+                signing_key = self._sign(signing_key, msg)
+            # A single assignment keeps the id and key consistent across
+            # threads signing with the same instance
+            self._signing_key = (key_id, signing_key)
+        return self._sign(signing_key, string_to_sign, hex=True)
+
 
 class Client:
     """Class to create client to interface with DocumentDB via a REST api"""
@@ -35,7 +128,16 @@ class Client:
         self.version = version
         self._boto_session = boto_session
 
-    @property
+    def __setattr__(self, name, value):
+        """Set an attribute. The cached urls are dropped when host, version,
+        database, or collection is set, so they are built again from the
+        new values."""
+        super().__setattr__(name, value)
+        if name in _URL_ATTRIBUTES:
+            for url_property in _URL_PROPERTIES:
+                self.__dict__.pop(url_property, None)
+
+    @cached_property
     def _base_url(self):
         """Construct base url to interface with a collection in a database."""
         return (
@@ -43,7 +145,7 @@ class Client:
             f"{self.collection}"
         )
 
-    @property
+    @cached_property
     def _aggregate_url(self):
         """Url to aggregate records."""
         return (
@@ -51,7 +153,7 @@ class Client:
             f"{self.collection}/aggregate"
         )
 
-    @property
+    @cached_property
     def _update_one_url(self):
         """Url to update one record"""
         return (
@@ -59,7 +161,7 @@ class Client:
             f"{self.collection}/update_one"
         )
 
-    @property
+    @cached_property
     def _delete_one_url(self):
         """Url to update one record"""
         return (
@@ -67,7 +169,7 @@ class Client:
             f"{self.collection}/delete_one"
         )
 
-    @property
+    @cached_property
     def _delete_many_url(self):
         """Url to update one record"""
         return (
@@ -75,7 +177,7 @@ class Client:
             f"{self.collection}/delete_many"
         )
 
-    @property
+    @cached_property
     def _bulk_write_url(self):
         """Url to bulk write many records."""
         return (
@@ -83,6 +185,30 @@ class Client:
             f"{self.collection}/bulk_write"
         )
 
+    @cached_property
+    def _session(self) -> requests.Session:
+        """Session that keeps connections to the host alive across calls.
+        Only GET reads are retried on 429, 502, 503, and 504 responses, so
+        writes are never sent twice. Throttled reads wait for the
+        Retry-After header if the server sends one."""
+        session = requests.Session()
+        retries = Retry(
+            total=3,
+            backoff_factor=0.2,
+            status_forcelist=[429, 502, 503, 504],
+            allowed_methods=["GET"],
+            raise_on_status=False,
+        )
+        session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=10,
+                pool_maxsize=_POOL_MAXSIZE,
+                max_retries=retries,
+            ),
+        )
+        return session
+
     @cached_property
     def __boto_session(self):
         """Boto3 session"""
@@ -90,12 +216,22 @@ class Client:
             self._boto_session = boto3.session.Session()
         return self._boto_session
 
+    @cached_property
+    def _sigv4_auth(self) -> _CachedSigV4Auth:
+        """SigV4 signer reused for every signed request. Refreshable
+        credentials refresh themselves when accessed during signing."""
+        return _CachedSigV4Auth(
+            self.__boto_session.get_credentials(),
+            "execute-api",
+            self.__boto_session.region_name,
+        )
+
     def _signed_request(
         self,
         url: str,
         method: str,
         params: Optional[dict] = None,
-        data: Optional[str] = None,
+        data: Optional[bytes] = None,
     ) -> AWSRequest:
         """Create a signed request to the DocumentDB REST api.
         Permissions are managed through AWS."""
@@ -106,13 +242,37 @@ class Client:
             params=params,
             headers={"Content-Type": "application/json"},
         )
-        SigV4Auth(
-            self.__boto_session.get_credentials(),
-            "execute-api",
-            self.__boto_session.region_name,
-        ).add_auth(aws_request)
+        self._sigv4_auth.add_auth(aws_request)
         return aws_request
 
+    @staticmethod
+    def _parse_response(response: Response):
+        """
+        Check the status of a response from the API Gateway and parse its
+        body. The raw body bytes are handed straight to orjson, so the
+        payload is decoded exactly once. orjson rejects NaN and Infinity, so
+        bodies holding them are parsed with response.json() instead.
+
+        Parameters
+        ----------
+        response : Response
+
+        Returns
+        -------
+        Any
+          The parsed json body.
+
+        """
+        if response.status_code != 200:
+            error_msg = response.text if response.text else "Unknown error"
+            raise ValueError(f"{response.status_code} Error: {error_msg}")
+        if not response.content:
+            raise ValueError("No payload in response")
+        try:
+            return orjson.loads(response.content)
+        except orjson.JSONDecodeError:
+            return response.json()
+
     def _count_records(self, filter_query: Optional[dict] = None):
         """
         Count the number of records in a collection.
@@ -133,12 +293,8 @@ class Client:
         }
         if filter_query is not None:
             params["filter"] = json.dumps(filter_query)
-        response = requests.get(self._base_url, params=params)
-        if response.status_code != 200:
-            error_msg = response.text if response.text else "Unknown error"
-            raise ValueError(f"{response.status_code} Error: {error_msg}")
-        response_body = response.json()
-        return response_body
+        response = self._session.get(self._base_url, params=params)
+        return self._parse_response(response)
 
     def _get_records(
         self,
@@ -169,92 +325,283 @@ class Client:
           The list of records returned from the DocumentDB.
 
         """
-        params = {"limit": str(limit), "skip": str(skip)}
+        query_params = self._encode_query_params(
+            filter_query=filter_query, projection=projection, sort=sort
+        )
+        return self._get_records_from_params(
+            query_params=query_params, limit=limit, skip=skip
+        )
+
+    @staticmethod
+    def _encode_query_params(
+        filter_query: Optional[dict] = None,
+        projection: Optional[dict] = None,
+        sort: Optional[dict] = None,
+    ) -> dict:
+        """
+        Encode the filter, projection, and sort into query string values.
+        Paginated requests can encode these once and reuse them for every
+        page.
+
+        Returns
+        -------
+        dict
+          Query params keyed by "filter", "projection", and "sort" for the
+          values that are not None.
+
+        """
+        query_params = {}
         if filter_query is not None:
-            params["filter"] = json.dumps(filter_query)
+            query_params["filter"] = json.dumps(filter_query)
         if projection is not None:
-            params["projection"] = json.dumps(projection)
+            query_params["projection"] = json.dumps(projection)
         if sort is not None:
-            params["sort"] = json.dumps(sort)
+            query_params["sort"] = json.dumps(sort)
+        return query_params
 
-        response = requests.get(self._base_url, params=params)
-        if response.status_code != 200:
-            error_msg = response.text if response.text else "Unknown error"
-            raise ValueError(f"{response.status_code} Error: {error_msg}")
-        if not response.content:
-            raise ValueError("No payload in response")
-        response_body = response.json()
-        return response_body
+    def _get_records_from_params(
+        self, query_params: dict, limit: int = 0, skip: int = 0
+    ) -> List[dict]:
+        """
+        Retrieve records from collection using already encoded query params.
+        Parameters
+        ----------
+        query_params : dict
+          Query params returned by _encode_query_params.
+        limit : int
+          Return a smaller set of records. 0 for all records. Default is 0.
+        skip : int
+          Skip this amount of records in index when applying search.
+
+        Returns
+        -------
+        List[dict]
+          The list of records returned from the DocumentDB.
+
+        """
+        params = {"limit": str(limit), "skip": str(skip), **query_params}
+        response = self._session.get(self._base_url, params=params)
+        return self._parse_response(response)
 
     def _aggregate_records(self, pipeline: List[dict]) -> List[dict]:
         """Aggregate records from collection using an aggregation pipeline."""
         # Do not need to sign request since API supports readonly aggregations
-        response = requests.post(url=self._aggregate_url, json=pipeline)
-        if response.status_code != 200:
-            error_msg = response.text if response.text else "Unknown error"
-            raise ValueError(f"{response.status_code} Error: {error_msg}")
-        if not response.content:
-            raise ValueError("No payload in response")
-        response_body = response.json()
-        return response_body
+        response = self._session.post(url=self._aggregate_url, json=pipeline)
+        return self._parse_response(response)
+
+    def _signed_call(self, method: str, url: str, data: bytes) -> Response:
+        """Sign a request to the DocumentDB REST api and send it."""
+        # The same bytes are hashed for the signature in a single pass and
+        # sent without another conversion.
+        signed_header = self._signed_request(method=method, url=url, data=data)
+        return self._session.request(
+            method=method,
+            url=url,
+            headers=dict(signed_header.headers),
+            data=data,
+        )
 
     def _upsert_one_record(
         self, record_filter: dict, update: dict
     ) -> Response:
         """Upsert a single record into the collection."""
-        data = json.dumps(
+        data = _dumps(
             {"filter": record_filter, "update": update, "upsert": "True"}
         )
-        signed_header = self._signed_request(
+        return self._signed_call(
             method="POST", url=self._update_one_url, data=data
         )
-        return requests.post(
-            url=self._update_one_url,
-            headers=dict(signed_header.headers),
-            data=data,
-        )
 
     def _delete_one_record(self, record_filter: dict) -> Response:
-        """Upsert a single record into the collection."""
-        data = json.dumps({"filter": record_filter})
-        signed_header = self._signed_request(
+        """Delete a single record from the collection."""
+        data = _dumps({"filter": record_filter})
+        return self._signed_call(
             method="DELETE", url=self._delete_one_url, data=data
         )
-        return requests.delete(
-            url=self._delete_one_url,
-            headers=dict(signed_header.headers),
-            data=data,
-        )
 
     def _delete_many_records(self, record_filter: dict) -> Response:
-        """Upsert a single record into the collection."""
-        data = json.dumps({"filter": record_filter})
-        signed_header = self._signed_request(
+        """Delete many records from the collection."""
+        data = _dumps({"filter": record_filter})
+        return self._signed_call(
             method="DELETE", url=self._delete_many_url, data=data
         )
-        return requests.delete(
-            url=self._delete_many_url,
-            headers=dict(signed_header.headers),
-            data=data,
-        )
 
     def _bulk_write(self, operations: List[dict]) -> Response:
         """Bulk write many records into the collection."""
+        return self._bulk_write_payload(_dumps(operations))
 
-        data = json.dumps(operations)
-        signed_header = self._signed_request(
+    def _bulk_write_payload(self, data: bytes) -> Response:
+        """Bulk write many records using an already encoded json array of
+        operations."""
+        return self._signed_call(
             method="POST", url=self._bulk_write_url, data=data
         )
-        return requests.post(
-            url=self._bulk_write_url,
-            headers=dict(signed_header.headers),
-            data=data,
-        )
 
 
 class MetadataDbClient(Client):
     """Class to manage reading and writing to metadata db"""
 
+    def _get_record_batches_by_id(
+        self,
+        filter_query: Optional[dict],
+        projection: Optional[dict],
+        limit: int,
+        paginate_batch_size: int,
+        paginate_max_iterations: int,
+    ) -> Iterator[List[dict]]:
+        """
+        Yield batches of records sorted by _id, requesting each page with a
+        filter on _id greater than the last _id seen instead of a skip. The
+        server does not need to walk past skipped documents and no count
+        request is needed. The projection must not exclude _id.
+        See retrieve_docdb_records for a description of the parameters.
+
+        Returns
+        -------
+        Iterator[List[dict]]
+
+        """
+        last_id = None
+        remaining = limit
+        for _ in range(paginate_max_iterations):
+            page_filter = filter_query
+            if last_id is not None:
+                id_filter = {"_id": {"$gt": last_id}}
+                page_filter = (
+                    id_filter
+                    if filter_query is None
+                    else {"$and": [filter_query, id_filter]}
+                )
+            page_size = (
+                paginate_batch_size
+                if limit == 0
+                else min(paginate_batch_size, remaining)
+            )
+            batched_records = self._get_records(
+                filter_query=page_filter,
+                projection=projection,
+                sort={"_id": 1},
+                limit=page_size,
+            )
+            if len(batched_records) > 0:
+                yield batched_records
+            remaining -= len(batched_records)
+            if len(batched_records) < page_size or (
+                limit != 0 and remaining <= 0
+            ):
+                return
+            last_id = batched_records[-1]["_id"]
+
+    def _get_record_batches(
+        self,
+        filter_query: Optional[dict],
+        projection: Optional[dict],
+        sort: Optional[dict],
+        limit: int,
+        paginate: bool,
+        paginate_batch_size: int,
+        paginate_max_iterations: int,
+        paginate_max_workers: int = 8,
+        paginate_by_id: bool = False,
+    ) -> Iterator[List[dict]]:
+        """
+        Yield batches of records from the DocDB API Gateway in order. The
+        first page is requested before the records are counted, and the
+        count is skipped if the first page is not full. Once the record count
+        is known, the remaining pages are requested concurrently and yielded
+        in skip order as they become available. If a page cannot be
+        retrieved, its error is raised instead of leaving a gap in the
+        records, and the pages that have not been requested yet are
+        cancelled.
+        See retrieve_docdb_records for a description of the parameters.
+
+        Returns
+        -------
+        Iterator[List[dict]]
+
+        """
+        if paginate is False:
+            yield self._get_records(
+                filter_query=filter_query,
+                projection=projection,
+                sort=sort,
+                limit=limit,
+            )
+            return
+        if paginate_by_id:
+            if sort is not None:
+                raise ValueError("sort cannot be set when paginate_by_id.")
+            yield from self._get_record_batches_by_id(
+                filter_query=filter_query,
+                projection=projection,
+                limit=limit,
+                paginate_batch_size=paginate_batch_size,
+                paginate_max_iterations=paginate_max_iterations,
+            )
+            return
+        # Encode the query once and reuse it for every page
+        query_params = self._encode_query_params(
+            filter_query=filter_query, projection=projection, sort=sort
+        )
+        # Request the first page before counting. If it is not full, or the
+        # limit fits in one page, no count request is needed.
+        first_page_limit = (
+            paginate_batch_size
+            if limit == 0
+            else min(paginate_batch_size, limit)
+        )
+        first_page = self._get_records_from_params(
+            query_params=query_params, limit=first_page_limit, skip=0
+        )
+        yield first_page
+        if len(first_page) < paginate_batch_size or (
+            first_page_limit == limit
+        ):
+            return
+        # Get record count
+        record_counts = self._count_records(filter_query)
+        filtered_record_count = record_counts["filtered_record_count"]
+        # Compute the remaining pages to request up front
+        target_count = (
+            filtered_record_count
+            if limit == 0
+            else min(filtered_record_count, limit)
+        )
+        num_of_pages = min(
+            math.ceil(target_count / paginate_batch_size),
+            paginate_max_iterations,
+        )
+        skips = range(
+            paginate_batch_size,
+            num_of_pages * paginate_batch_size,
+            paginate_batch_size,
+        )
+        with ThreadPoolExecutor(
+            max_workers=min(paginate_max_workers, _POOL_MAXSIZE)
+        ) as ex:
+            futures = [
+                ex.submit(
+                    self._get_records_from_params,
+                    query_params=query_params,
+                    limit=paginate_batch_size,
+                    skip=skip,
+                )
+                for skip in skips
+            ]
+            try:
+                # Futures are consumed in submission order to preserve sort
+                for skip, future in zip(skips, futures):
+                    batched_records = future.result()
+                    # Drop any records past the requested limit
+                    page_limit = target_count - skip
+                    yield batched_records[0:page_limit]
+                    # TODO: Add optional progress bar?
+            finally:
+                # Don't start the remaining pages if a page failed or the
+                # caller stopped early
+                for future in futures:
+                    future.cancel()
+
     def retrieve_docdb_records(
         self,
         filter_query: Optional[dict] = None,
@@ -264,6 +611,8 @@ class MetadataDbClient(Client):
         paginate: bool = True,
         paginate_batch_size: int = 500,
         paginate_max_iterations: int = 20000,
+        paginate_max_workers: int = 8,
+        paginate_by_id: bool = False,
     ) -> List[dict]:
         """
         Retrieve raw json records from DocDB API Gateway as a list of dicts.
@@ -287,61 +636,34 @@ class MetadataDbClient(Client):
         paginate_max_iterations : int
           Max number of iterations to run to prevent indefinite calls to the
           API Gateway. Default is 20000.
+        paginate_max_workers : int
+          Number of pages to request concurrently when paginating. Capped
+          at the size of the connection pool, 20. Default is 8.
+        paginate_by_id : bool
+          If set to true, pages are sorted by _id and requested with a
+          filter on the last _id seen instead of skipping records. This is
+          faster on large collections and is not affected by records that
+          are written while paginating. Cannot be used together with sort.
+          Default is False.
 
         Returns
         -------
         List[dict]
 
         """
-        if paginate is False:
-            records = self._get_records(
-                filter_query=filter_query,
-                projection=projection,
-                sort=sort,
-                limit=limit,
-            )
-        else:
-            # Get record count
-            record_counts = self._count_records(filter_query)
-            total_record_count = record_counts["total_record_count"]
-            filtered_record_count = record_counts["filtered_record_count"]
-            if filtered_record_count <= paginate_batch_size:
-                records = self._get_records(
-                    filter_query=filter_query, projection=projection, sort=sort
-                )
-            else:
-                records = []
-                errors = []
-                num_of_records_collected = 0
-                limit = filtered_record_count if limit == 0 else limit
-                skip = 0
-                iter_count = 0
-                while (
-                    skip < total_record_count
-                    and num_of_records_collected
-                    < min(filtered_record_count, limit)
-                    and iter_count < paginate_max_iterations
-                ):
-                    try:
-                        batched_records = self._get_records(
-                            filter_query=filter_query,
-                            projection=projection,
-                            sort=sort,
-                            limit=paginate_batch_size,
-                            skip=skip,
-                        )
-                        num_of_records_collected += len(batched_records)
-                        records.extend(batched_records)
-                    except Exception as e:
-                        errors.append(repr(e))
-                    skip = skip + paginate_batch_size
-                    iter_count += 1
-                    # TODO: Add optional progress bar?
-                records = records[0:limit]
-                if len(errors) > 0:
-                    logging.error(
-                        f"There were errors retrieving records. {errors}"
-                    )
+        records = []
+        for batched_records in self._get_record_batches(
+            filter_query=filter_query,
+            projection=projection,
+            sort=sort,
+            limit=limit,
+            paginate=paginate,
+            paginate_batch_size=paginate_batch_size,
+            paginate_max_iterations=paginate_max_iterations,
+            paginate_max_workers=paginate_max_workers,
+            paginate_by_id=paginate_by_id,
+        ):
+            records.extend(batched_records)
         return records
 
     def aggregate_docdb_records(self, pipeline: List[dict]) -> List[dict]:
@@ -358,7 +680,8 @@ class MetadataDbClient(Client):
         paginate: bool = True,
         paginate_batch_size: int = 10,
         paginate_max_iterations: int = 20000,
-    ) -> List[DataAssetRecord]:
+        coerce: bool = True,
+    ) -> Union[List[DataAssetRecord], List[dict]]:
         """
         DEPRECATED: This method is deprecated. Use `retrieve_docdb_records`
         instead.
@@ -384,10 +707,13 @@ class MetadataDbClient(Client):
         paginate_max_iterations : int
           Max number of iterations to run to prevent indefinite calls to the
           API Gateway. Default is 20000.
+        coerce : bool
+          If set to false, the raw records are returned as dicts and are not
+          validated as DataAssetRecords. Default is True.
 
         Returns
         -------
-        List[DataAssetRecord]
+        Union[List[DataAssetRecord], List[dict]]
 
         """
         warnings.warn(
@@ -397,58 +723,21 @@ class MetadataDbClient(Client):
             DeprecationWarning,
             stacklevel=2,
         )
-        if paginate is False:
-            records = self._get_records(
-                filter_query=filter_query,
-                projection=projection,
-                sort=sort,
-                limit=limit,
-            )
-        else:
-            # Get record count
-            record_counts = self._count_records(filter_query)
-            total_record_count = record_counts["total_record_count"]
-            filtered_record_count = record_counts["filtered_record_count"]
-            if filtered_record_count <= paginate_batch_size:
-                records = self._get_records(
-                    filter_query=filter_query, projection=projection, sort=sort
-                )
-            else:
-                records = []
-                errors = []
-                num_of_records_collected = 0
-                limit = filtered_record_count if limit == 0 else limit
-                skip = 0
-                iter_count = 0
-                while (
-                    skip < total_record_count
-                    and num_of_records_collected
-                    < min(filtered_record_count, limit)
-                    and iter_count < paginate_max_iterations
-                ):
-                    try:
-                        batched_records = self._get_records(
-                            filter_query=filter_query,
-                            projection=projection,
-                            sort=sort,
-                            limit=paginate_batch_size,
-                            skip=skip,
-                        )
-                        num_of_records_collected += len(batched_records)
-                        records.extend(batched_records)
-                    except Exception as e:
-                        errors.append(repr(e))
-                    skip = skip + paginate_batch_size
-                    iter_count += 1
-                    # TODO: Add optional progress bar?
-                records = records[0:limit]
-                if len(errors) > 0:
-                    logging.error(
-                        f"There were errors retrieving records. {errors}"
-                    )
         data_asset_records = []
-        for record in records:
-            data_asset_records.append(DataAssetRecord(**record))
+        for batched_records in self._get_record_batches(
+            filter_query=filter_query,
+            projection=projection,
+            sort=sort,
+            limit=limit,
+            paginate=paginate,
+            paginate_batch_size=paginate_batch_size,
+            paginate_max_iterations=paginate_max_iterations,
+        ):
+            data_asset_records.extend(
+                _DATA_ASSET_RECORDS_ADAPTER.validate_python(batched_records)
+                if coerce
+                else batched_records
+            )
         return data_asset_records
 
     def upsert_one_docdb_record(self, record: dict) -> Response:
@@ -459,7 +748,7 @@ class MetadataDbClient(Client):
             raise ValueError("Record is corrupt and cannot be upserted.")
         response = self._upsert_one_record(
             record_filter={"_id": record["_id"]},
-            update={"$set": json.loads(json.dumps(record, default=str))},
+            update={"$set": record},
         )
         return response
 
@@ -483,8 +772,8 @@ class MetadataDbClient(Client):
         response = self._upsert_one_record(
             record_filter={"_id": data_asset_record.id},
             update={
-                "$set": json.loads(
-                    data_asset_record.model_dump_json(by_alias=True)
+                "$set": data_asset_record.model_dump(
+                    mode="json", by_alias=True
                 )
             },
         )
@@ -508,21 +797,112 @@ class MetadataDbClient(Client):
         )
         return response
 
+    def delete_many_by_ids(
+        self,
+        data_asset_record_ids: List[str],
+        chunk_size: int = 1000,
+        max_workers: int = 8,
+    ) -> List[Response]:
+        """
+        Delete records by their ids, issuing one delete_many request per
+        chunk of ids rather than one request per id. Chunks are sent
+        concurrently.
+
+        Parameters
+        ----------
+        data_asset_record_ids : List[str]
+          List of record ids to delete.
+        chunk_size : int
+          Max number of ids to send in a single delete_many request.
+          Default is 1000.
+        max_workers : int
+          Max number of chunks to send concurrently. Capped at the size of
+          the connection pool, 20. Default is 8.
+
+        Returns
+        -------
+        List[Response]
+          One response per chunk that was sent, in the order of the chunks.
+
+        """
+        if len(data_asset_record_ids) == 0:
+            return []
+        chunks = []
+        for start in range(0, len(data_asset_record_ids), chunk_size):
+            end = start + chunk_size
+            chunks.append(data_asset_record_ids[start:end])
+        with ThreadPoolExecutor(
+            max_workers=min(max_workers, _POOL_MAXSIZE, len(chunks))
+        ) as ex:
+            return list(ex.map(self.delete_many_records, chunks))
+
     @staticmethod
-    def _record_to_operation(record: str, record_id: str) -> dict:
+    def _record_to_operation(record: dict, record_id: str) -> dict:
         """Maps a record into an operation"""
         return {
             "UpdateOne": {
                 "filter": {"_id": record_id},
-                "update": {"$set": json.loads(record)},
+                "update": {"$set": record},
                 "upsert": "True",
             }
         }
 
+    @staticmethod
+    def _encode_operation(record_json: bytes, record_id: str) -> bytes:
+        """Maps an encoded record into an encoded operation. The record
+        bytes are spliced in as they are, so they are not encoded again."""
+        return (
+            b'{"UpdateOne":{"filter":{"_id":'
+            + _dumps(record_id)
+            + b'},"update":{"$set":'
+            + record_json
+            + b'},"upsert":"True"}}'
+        )
+
+    def _iter_bulk_write_payloads(
+        self, records: List[dict], max_payload_size: int
+    ) -> Iterator[bytes]:
+        """
+        Lazily encode records into bulk write payloads. Records are added
+        to a chunk until the size of their encoded json in bytes would
+        exceed max_payload_size.
+
+        Parameters
+        ----------
+        records : List[dict]
+          Validated records to upsert.
+        max_payload_size : int
+          Max size of a chunk in bytes. A single record larger than this is
+          still yielded in a chunk of its own.
+
+        Returns
+        -------
+        Iterator[bytes]
+          Encoded json arrays of UpdateOne operations.
+
+        """
+        operations = []
+        total_size = 0
+        for record in records:
+            record_json = _dumps(record)
+            record_size = len(record_json)
+            if operations and total_size + record_size > max_payload_size:
+                yield b"[" + b",".join(operations) + b"]"
+                operations = []
+                total_size = 0
+            operations.append(
+                self._encode_operation(
+                    record_json=record_json, record_id=record["_id"]
+                )
+            )
+            total_size += record_size
+        yield b"[" + b",".join(operations) + b"]"
+
     def upsert_list_of_docdb_records(
         self,
         records: List[dict],
         max_payload_size: int = 5e6,
+        max_workers: int = 8,
     ) -> List[Response]:
         """
         Upsert a list of records. There's a limit to the size of the
@@ -539,17 +919,22 @@ class MetadataDbClient(Client):
           will be made to upsert the record but will most likely receive a 413
           status code. The Default is 2e6 bytes. The max payload for the API
           Gateway including headers is 10MB.
+        max_workers : int
+          Max number of chunks to send concurrently. Capped at the size of
+          the connection pool, 20. Default is 8.
 
         Returns
         -------
         List[Response]
-          A list of responses from the API Gateway.
+          A list of responses from the API Gateway in the order of the
+          chunks.
 
         """
         if len(records) == 0:
             return []
         else:
-            # check no record is corrupt or missing _id
+            # check no record is corrupt or missing _id before anything is
+            # sent
             for record in records:
                 if record.get("_id") is None:
                     raise ValueError("A record does not have an _id field.")
@@ -557,49 +942,24 @@ class MetadataDbClient(Client):
                     raise ValueError(
                         "A record is corrupt and cannot be upserted."
                     )
-            # chunk records
-            first_index = 0
-            end_index = len(records)
-            second_index = 1
+            # Each chunk is sent as soon as it is encoded, so encoding the
+            # next chunk overlaps with waiting on the previous requests. Once
+            # max_workers chunks are in flight, the oldest is waited on before
+            # the next is encoded, so only that many payloads are in memory.
+            # TODO: Add optional progress bar?
+            max_workers = min(max_workers, _POOL_MAXSIZE)
             responses = []
-            record_json = json.dumps(records[first_index], default=str)
-            total_size = getsizeof(record_json)
-            operations = [
-                self._record_to_operation(
-                    record=record_json,
-                    record_id=records[first_index].get("_id"),
-                )
-            ]
-            while second_index < end_index + 1:
-                # TODO: Add optional progress bar?
-                if second_index == end_index:
-                    response = self._bulk_write(operations)
-                    responses.append(response)
-                else:
-                    record_json = json.dumps(
-                        records[second_index], default=str
+            with ThreadPoolExecutor(max_workers=max_workers) as ex:
+                in_flight = deque()
+                for payload in self._iter_bulk_write_payloads(
+                    records=records, max_payload_size=max_payload_size
+                ):
+                    if len(in_flight) == max_workers:
+                        responses.append(in_flight.popleft().result())
+                    in_flight.append(
+                        ex.submit(self._bulk_write_payload, payload)
                     )
-                    record_size = getsizeof(record_json)
-                    if total_size + record_size > max_payload_size:
-                        response = self._bulk_write(operations)
-                        responses.append(response)
-                        first_index = second_index
-                        operations = [
-                            self._record_to_operation(
-                                record=record_json,
-                                record_id=records[first_index].get("_id"),
-                            )
-                        ]
-                        total_size = record_size
-                    else:
-                        operations.append(
-                            self._record_to_operation(
-                                record=record_json,
-                                record_id=records[second_index].get("_id"),
-                            )
-                        )
-                        total_size += record_size
-                second_index = second_index + 1
+                responses.extend(future.result() for future in in_flight)
         return responses
 
     # TODO: remove this method
@@ -643,49 +1003,25 @@ class MetadataDbClient(Client):
         if len(data_asset_records) == 0:
             return []
         else:
-            first_index = 0
-            end_index = len(data_asset_records)
-            second_index = 1
             responses = []
-            record_json = data_asset_records[first_index].model_dump_json(
-                by_alias=True
-            )
-            total_size = getsizeof(record_json)
-            operations = [
-                self._record_to_operation(
-                    record=record_json,
-                    record_id=data_asset_records[first_index].id,
+            operations = []
+            total_size = 0
+            for data_asset_record in data_asset_records:
+                record = data_asset_record.model_dump(
+                    mode="json", by_alias=True
                 )
-            ]
-            while second_index < end_index + 1:
-                if second_index == end_index:
-                    response = self._bulk_write(operations)
-                    responses.append(response)
-                else:
-                    record_json = data_asset_records[
-                        second_index
-                    ].model_dump_json(by_alias=True)
-                    record_size = getsizeof(record_json)
-                    if total_size + record_size > max_payload_size:
-                        response = self._bulk_write(operations)
-                        responses.append(response)
-                        first_index = second_index
-                        operations = [
-                            self._record_to_operation(
-                                record=record_json,
-                                record_id=data_asset_records[first_index].id,
-                            )
-                        ]
-                        total_size = record_size
-                    else:
-                        operations.append(
-                            self._record_to_operation(
-                                record=record_json,
-                                record_id=data_asset_records[second_index].id,
-                            )
-                        )
-                        total_size += record_size
-                second_index = second_index + 1
+                record_size = len(_dumps(record))
+                if operations and total_size + record_size > max_payload_size:
+                    responses.append(self._bulk_write(operations))
+                    operations = []
+                    total_size = 0
+                operations.append(
+                    self._record_to_operation(
+                        record=record, record_id=data_asset_record.id
+                    )
+                )
+                total_size += record_size
+            responses.append(self._bulk_write(operations))
         return responses
 
 
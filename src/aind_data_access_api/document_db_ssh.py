@@ -1,14 +1,19 @@
 """Module to interface with the Document Database using SSH tunneling."""
 
 import logging
+import threading
+from functools import cached_property
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from pydantic import Field, SecretStr
 from pydantic_settings import SettingsConfigDict
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
+from pymongo.results import BulkWriteResult
 from sshtunnel import SSHTunnelForwarder
 
 from aind_data_access_api.credentials import CoreCredentials
 from aind_data_access_api.secrets import get_secret
+from aind_data_access_api.utils import is_dict_corrupt
 
 
 class DocumentDbSSHCredentials(CoreCredentials):
@@ -69,8 +74,7 @@ class DocumentDbSSHCredentials(CoreCredentials):
 class DocumentDbSSHClient:
     """Class to establish a Document Store client with SSH tunneling."""
 
-    # TODO: add retrieve_docdb_records, upsert_one_docdb_record,
-    # and upsert_list_of_docdb_records methods
+    # TODO: add retrieve_docdb_records and upsert_one_docdb_record methods
 
     def __init__(self, credentials: DocumentDbSSHCredentials):
         """
@@ -83,19 +87,178 @@ class DocumentDbSSHClient:
         self.credentials = credentials
         self.database_name = credentials.database
         self.collection_name = credentials.collection
+        # Set when the client is handed out by get_shared_client
+        self._shared_key = None
+        self._ref_count = 0
+        # The tunnel and client are only created when first needed
+        self._client = None
+        self._ssh_server = None
+        self._start_lock = threading.Lock()
 
-    @property
+    def __setattr__(self, name, value):
+        """Set an attribute. The cached collection is dropped when the
+        database_name or collection_name are set, so it is looked up again
+        with the new values."""
+        super().__setattr__(name, value)
+        if name in ("database_name", "collection_name"):
+            self.__dict__.pop("collection", None)
+
+    @cached_property
     def collection(self):
-        """Collection of metadata records in Document Database."""
-        db = self._client[self.database_name]
-        collection = db[self.collection_name]
-        return collection
+        """Collection of metadata records in Document Database. Starts the
+        client and SSH tunnel if they have not been started yet."""
+        return self.get_collection(self.collection_name)
+
+    def get_collection(
+        self, collection_name: str, database_name: Optional[str] = None
+    ):
+        """
+        Get any collection through this client's MongoClient and SSH tunnel,
+        so switching collections does not open another connection. Starts
+        the client and SSH tunnel if they have not been started yet.
+
+        Parameters
+        ----------
+        collection_name : str
+          Name of the collection.
+        database_name : Optional[str]
+          Name of the database. Defaults to the database in the credentials.
+
+        Returns
+        -------
+        Collection
+
+        """
+        if self._client is None:
+            self.start()
+        db = self._client[database_name or self.database_name]
+        return db[collection_name]
+
+    def find_many_by_ids(
+        self,
+        ids: List[str],
+        projection: Optional[dict] = None,
+        batch_size: int = 1000,
+    ) -> Dict[str, dict]:
+        """
+        Find records by their ids with one $in query per batch of ids
+        instead of one find_one round-trip per id.
+
+        Parameters
+        ----------
+        ids : List[str]
+          List of record ids to find.
+        projection : Optional[dict]
+          Subset of document fields to return. Default is None.
+        batch_size : int
+          Max number of ids to send in a single query. Default is 1000.
+
+        Returns
+        -------
+        Dict[str, dict]
+          Records keyed by their _id. Ids that are not found are omitted.
+
+        """
+        records = {}
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            cursor = self.collection.find(
+                {"_id": {"$in": ids[start:end]}}, projection
+            )
+            for record in cursor:
+                records[record["_id"]] = record
+        return records
+
+    def iter_collection(
+        self,
+        filter_query: Optional[dict] = None,
+        projection: Optional[dict] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[dict]:
+        """
+        Lazily iterate over the records in the collection. The cursor pulls
+        batch_size records per round-trip, so records can be processed while
+        the rest are still on the server. Consume the iterator lazily rather
+        than materializing it with list(...).
+
+        Parameters
+        ----------
+        filter_query : Optional[dict]
+          Filter to apply to the records being returned. Default is None.
+        projection : Optional[dict]
+          Subset of document fields to return. Default is None.
+        batch_size : int
+          Number of records to fetch per round-trip. Default is 1000.
+
+        Returns
+        -------
+        Iterator[dict]
+
+        """
+        cursor = self.collection.find(filter_query or {}, projection)
+        cursor.batch_size(batch_size)
+        try:
+            for record in cursor:
+                yield record
+        finally:
+            cursor.close()
+
+    def upsert_list_of_docdb_records(
+        self,
+        records: List[dict],
+        batch_size: int = 1000,
+        ordered: bool = False,
+    ) -> List[BulkWriteResult]:
+        """
+        Upsert a list of records with one bulk_write per batch of records
+        instead of one round-trip through the tunnel per record.
+
+        Parameters
+        ----------
+        records : List[dict]
+          List of records to upsert into the DocDB database.
+        batch_size : int
+          Max number of records to send in a single bulk_write. Default is
+          1000.
+        ordered : bool
+          If False, the server may apply the operations in any order and
+          continues past individual failures. Default is False.
+
+        Returns
+        -------
+        List[BulkWriteResult]
+          One result per batch that was written.
+
+        """
+        # check no record is corrupt or missing _id before anything is sent
+        for record in records:
+            if record.get("_id") is None:
+                raise ValueError("A record does not have an _id field.")
+            if is_dict_corrupt(record):
+                raise ValueError("A record is corrupt and cannot be upserted.")
+        operations = [
+            UpdateOne({"_id": record["_id"]}, {"$set": record}, upsert=True)
+            for record in records
+        ]
+        results = []
+        for start in range(0, len(operations), batch_size):
+            end = start + batch_size
+            results.append(
+                self.collection.bulk_write(
+                    operations[start:end], ordered=ordered
+                )
+            )
+        return results
 
     def _create_mongo_client(self):
         """
         Create a MongoClient to connect to the Document Store.
         Uses retryWrites=False to enable writing to AWS DocumentDB.
         Uses authMechanism="SCRAM-SHA-1" for complex usernames.
+        Uses maxIdleTimeMS to replace pooled connections before an idle SSH
+        tunnel silently drops them.
+        Uses zlib wire compression, if the server supports it, to reduce the
+        bytes sent through the SSH tunnel.
         """
         return MongoClient(
             host=self.credentials.ssh_local_bind_address,
@@ -106,10 +269,13 @@ class DocumentDbSSHClient:
             password=self.credentials.password.get_secret_value(),
             authSource="admin",
             authMechanism="SCRAM-SHA-1",
+            maxIdleTimeMS=60000,
+            compressors="zlib",
         )
 
     def _create_ssh_tunnel(self):
-        """Create an SSH tunnel to the Document Database."""
+        """Create an SSH tunnel to the Document Database. The SSH transport
+        sends keepalive packets so an idle tunnel is not dropped."""
         return SSHTunnelForwarder(
             ssh_address_or_host=(
                 self.credentials.ssh_host,
@@ -122,14 +288,31 @@ class DocumentDbSSHClient:
                 self.credentials.ssh_local_bind_address,
                 self.credentials.port,
             ),
+            set_keepalive=30.0,
         )
 
     def start(self):
-        """Start the client and SSH tunnel."""
-        self._client = self._create_mongo_client()
-        self._ssh_server = self._create_ssh_tunnel()
-        self._ssh_server.start()
-        server_info = self._client.server_info()
+        """Start the SSH tunnel and then the client bound to its local port.
+        Does nothing if they are already started. If any step fails, the
+        tunnel is stopped and the client is left unstarted."""
+        with self._start_lock:
+            if self._client is not None:
+                return
+            ssh_server = self._create_ssh_tunnel()
+            ssh_server.start()
+            client = None
+            try:
+                client = self._create_mongo_client()
+                server_info = client.server_info()
+            except Exception:
+                if client is not None:
+                    client.close()
+                ssh_server.stop()
+                self._client = None
+                self._ssh_server = None
+                raise
+            self._ssh_server = ssh_server
+            self._client = client
         logging.info(server_info)
         logging.info(
             f"Connected to {self.credentials.host}:{self.credentials.port} as "
@@ -137,16 +320,80 @@ class DocumentDbSSHClient:
         )
 
     def close(self):
-        """Close the client and SSH tunnel."""
+        """Close the client and SSH tunnel. A shared client is only closed
+        once every caller of get_shared_client has closed it."""
+        if self._shared_key is not None:
+            with _SHARED_CLIENTS_LOCK:
+                self._ref_count -= 1
+                if self._ref_count > 0:
+                    return
+                del _SHARED_CLIENTS[self._shared_key]
+                self._shared_key = None
+        if self._client is None:
+            return
         self._client.close()
         self._ssh_server.stop()
+        self._client = None
+        self._ssh_server = None
+        self.__dict__.pop("collection", None)
         logging.info("DocDB SSH session closed.")
 
     def __enter__(self):
-        """Enter the context manager."""
+        """Enter the context manager. A client that is already started, such
+        as a shared client, reuses its live tunnel."""
         self.start()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Exit the context manager."""
         self.close()
+
+
+_SHARED_CLIENTS: Dict[Tuple, DocumentDbSSHClient] = {}
+_SHARED_CLIENTS_LOCK = threading.Lock()
+
+
+def get_shared_client(
+    credentials: DocumentDbSSHCredentials,
+) -> DocumentDbSSHClient:
+    """
+    Get a started DocumentDbSSHClient that is shared by every caller using
+    the same hosts, user, database, and collection. The SSH tunnel and
+    Mongo authentication are only set up for the first caller. Each call
+    must be paired with a close(), or used as a context manager, and the
+    tunnel is stopped when the last caller closes the client.
+
+    Parameters
+    ----------
+    credentials : DocumentDbSSHCredentials
+
+    Returns
+    -------
+    DocumentDbSSHClient
+
+    """
+    key = (
+        credentials.ssh_host,
+        credentials.ssh_port,
+        credentials.host,
+        credentials.port,
+        credentials.username,
+        credentials.database,
+        credentials.collection,
+    )
+    with _SHARED_CLIENTS_LOCK:
+        client = _SHARED_CLIENTS.get(key)
+        if client is None:
+            client = DocumentDbSSHClient(credentials=credentials)
+            client._shared_key = key
+            _SHARED_CLIENTS[key] = client
+        client._ref_count += 1
+    # The tunnel and handshake run outside the registry lock, so a slow
+    # connection only holds up callers of the same key, which wait on the
+    # client's own start lock.
+    try:
+        client.start()
+    except Exception:
+        client.close()
+        raise
+    return client
@@ -1,16 +1,31 @@
 """Module to interface with the Document Store"""
 
-import json
+import hashlib
+import hmac
 import logging
-from typing import Iterator, List, Optional
+import secrets
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from pydantic import AliasChoices, Field, SecretStr
 from pydantic_settings import SettingsConfigDict
 from pymongo import MongoClient, UpdateOne
+from pymongo.results import BulkWriteResult
 
 from aind_data_access_api.credentials import CoreCredentials
 from aind_data_access_api.models import DataAssetRecord
 
+_MONGO_CLIENTS: Dict[Tuple, MongoClient] = {}
+_MONGO_CLIENT_REF_COUNTS: Dict[Tuple, int] = {}
+_MONGO_CLIENTS_LOCK = threading.Lock()
+# Passwords in the registry keys are replaced with an HMAC under this random
+# per-process key, so the registry holds no password or plain digest of one
+_MONGO_CLIENT_KEY_SECRET = secrets.token_bytes(32)
+
 
 # TODO: deprecate this class
 class DocumentStoreCredentials(CoreCredentials):
@@ -52,18 +67,52 @@ class Client:
           Whether supported write operations executed within the MongoClient
           will be retried once after a network error. Default is True. Set to
           False if writing to AWS DocumentDB.
+
+        Clients built with the same host, port, user, password, and
+        retry_writes share one MongoClient and its connection pool. It is
+        closed when the last of those clients is closed. The registry is
+        keyed on an HMAC of the password under a random per-process key,
+        never the password itself.
         """
         self.credentials = credentials
         self.collection_name = collection_name
-        self._client = MongoClient(
+        password = credentials.password.get_secret_value()
+        key = (
             credentials.host,
-            port=credentials.port,
-            username=credentials.username,
-            password=credentials.password.get_secret_value(),
-            retryWrites=retry_writes,
+            credentials.port,
+            credentials.username,
+            hmac.new(
+                _MONGO_CLIENT_KEY_SECRET,
+                password.encode("utf-8"),
+                hashlib.sha256,
+            ).hexdigest(),
+            retry_writes,
         )
+        with _MONGO_CLIENTS_LOCK:
+            client = _MONGO_CLIENTS.get(key)
+            if client is None:
+                client = MongoClient(
+                    credentials.host,
+                    port=credentials.port,
+                    username=credentials.username,
+                    password=password,
+                    retryWrites=retry_writes,
+                )
+                _MONGO_CLIENTS[key] = client
+                _MONGO_CLIENT_REF_COUNTS[key] = 0
+            _MONGO_CLIENT_REF_COUNTS[key] += 1
+        self._client_key = key
+        self._client = client
+
+    def __setattr__(self, name, value):
+        """Set an attribute. The cached collection is dropped when the
+        credentials or collection_name are set, so it is looked up again
+        with the new values."""
+        super().__setattr__(name, value)
+        if name in ("credentials", "collection_name"):
+            self.__dict__.pop("collection", None)
 
-    @property
+    @cached_property
     def collection(self):
         """Collection of records in Document Store database to access."""
         db = self._client[self.credentials.database]
@@ -73,11 +122,31 @@ class Client:
         return collection
 
     def close(self):
-        """Close the client."""
-        self._client.close()
+        """Close the client. It drops its handle on the shared MongoClient by
+        setting _client to None and clearing the cached collection, so it
+        has no collection to use afterwards. The shared MongoClient itself
+        is only closed once every client using it has been closed."""
+        self.__dict__.pop("collection", None)
+        key = self._client_key
+        if key is None:
+            return
+        client = self._client
+        self._client_key = None
+        self._client = None
+        with _MONGO_CLIENTS_LOCK:
+            _MONGO_CLIENT_REF_COUNTS[key] -= 1
+            if _MONGO_CLIENT_REF_COUNTS[key] > 0:
+                return
+            del _MONGO_CLIENT_REF_COUNTS[key]
+            del _MONGO_CLIENTS[key]
+        client.close()
 
     def retrieve_data_asset_records(
-        self, query: dict = None
+        self,
+        query: dict = None,
+        batch_size: int = 1000,
+        projection: Optional[dict] = None,
+        validate: bool = True,
     ) -> Iterator[DataAssetRecord]:
         """
         Retrieve data asset records. Will pull all records if query is None.
@@ -91,15 +160,74 @@ class Client:
           A query to add additional filtering. Consult:
           https://pymongo.readthedocs.io/en/stable/tutorial.html
           for additional information.
+        batch_size : int
+          Number of records the cursor fetches per round-trip. Larger values
+          mean fewer round-trips at the cost of more records buffered in
+          memory. Default is 1000.
+        projection : Optional[dict]
+          Subset of document fields to return. Default is None.
+        validate : bool
+          If set to false, records are built with model_construct, which
+          skips validation and type coercion. Useful with a projection when
+          only a few fields are read from each record. Default is True.
 
         Returns
         -------
         Iterator[DataAssetRecord]
 
         """
-        iter_response = self.collection.find(query)
+        iter_response = self.collection.find(
+            filter=query, projection=projection, batch_size=batch_size
+        )
+        for response in iter_response:
+            yield (
+                DataAssetRecord(**response)
+                if validate
+                else DataAssetRecord.model_construct(**response)
+            )
+
+    def scan_field(
+        self,
+        field_path: str,
+        query: Optional[dict] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Any]:
+        """
+        Yield the value of a single field from every record matching the
+        query. Only that field is projected, and no DataAssetRecord is built
+        per record, so it is a cheap way to read one column of data. For
+        example, scan_field("subject.subject_id") yields every subject_id.
+
+        Parameters
+        ----------
+        field_path : str
+          Dot-separated path to the field, e.g. "subject.subject_id".
+        query : Optional[dict]
+          A query to filter the records. Default is None, which scans all
+          records.
+        batch_size : int
+          Number of records the cursor fetches per round-trip. Default is
+          1000.
+
+        Returns
+        -------
+        Iterator[Any]
+          The field value for each record, or None if a record does not
+          have the field.
+
+        """
+        keys = field_path.split(".")
+        projection = {field_path: 1}
+        if field_path != "_id":
+            projection["_id"] = 0
+        iter_response = self.collection.find(
+            filter=query, projection=projection, batch_size=batch_size
+        )
         for response in iter_response:
-            yield DataAssetRecord(**response)
+            value = response
+            for key in keys:
+                value = value.get(key) if isinstance(value, dict) else None
+            yield value
 
     def upsert_one_record(self, data_asset_record: DataAssetRecord) -> None:
         """
@@ -116,23 +244,36 @@ class Client:
         # TODO: Add error handling
         upsert_response = self.collection.update_one(
             {"_id": data_asset_record.id},
-            {
-                "$set": json.loads(
-                    data_asset_record.model_dump_json(by_alias=True)
-                )
-            },
+            {"$set": data_asset_record.model_dump(mode="json", by_alias=True)},
             upsert=True,
         )
         logging.info(upsert_response)
 
     def upsert_list_of_records(
-        self, data_asset_records: List[DataAssetRecord]
+        self,
+        data_asset_records: Iterable[DataAssetRecord],
+        batch_size: int = 1000,
+        ordered: bool = False,
+        max_workers: int = 4,
     ) -> None:
         """
-        Bulk upsert a list of records into the Document Store
+        Bulk upsert a list of records into the Document Store. Records are
+        sent in bulk_write batches as they are read, so a generator of
+        records does not need to be materialized. Unordered batches are
+        sent concurrently.
         Parameters
         ----------
-        data_asset_records : List[DataAssetRecord]
+        data_asset_records : Iterable[DataAssetRecord]
+        batch_size : int
+          Max number of records to send in a single bulk_write. Default is
+          1000.
+        ordered : bool
+          If False, the server may apply the operations in any order and
+          continues past individual failures. Default is False.
+        max_workers : int
+          Number of batches in flight at once when ordered is False. Capped
+          at the MongoClient's max pool size. Batches are sent one at a time,
+          stopping at the first error, when ordered is True. Default is 4.
 
         Returns
         -------
@@ -140,13 +281,106 @@ class Client:
 
         """
         # TODO: Add error handling
-        operations = [
+        operations = (
             UpdateOne(
                 {"_id": rec.id},
-                {"$set": json.loads(rec.model_dump_json(by_alias=True))},
+                {"$set": rec.model_dump(mode="json", by_alias=True)},
                 upsert=True,
             )
             for rec in data_asset_records
-        ]
-        bulk_write_response = self.collection.bulk_write(operations)
-        logging.info(bulk_write_response)
+        )
+        chunks = iter(lambda: list(islice(operations, batch_size)), [])
+        if ordered:
+            bulk_write_responses = (
+                self.collection.bulk_write(chunk, ordered=True)
+                for chunk in chunks
+            )
+        else:
+            bulk_write_responses = self._bulk_write_concurrently(
+                chunks,
+                max_workers=min(
+                    max_workers,
+                    self._client.options.pool_options.max_pool_size,
+                ),
+            )
+        upserted_count = 0
+        modified_count = 0
+        for bulk_write_response in bulk_write_responses:
+            upserted_count += bulk_write_response.upserted_count
+            modified_count += bulk_write_response.modified_count
+        # Formatting is deferred until the record is emitted
+        logging.info(
+            "Upserted %d and modified %d records.",
+            upserted_count,
+            modified_count,
+        )
+
+    def _bulk_write_concurrently(
+        self, chunks: Iterator[List[UpdateOne]], max_workers: int
+    ) -> Iterator[BulkWriteResult]:
+        """
+        Send unordered bulk_write batches from a thread pool. At most
+        max_workers batches are in flight, so only that many are held in
+        memory while the next one is built.
+        Parameters
+        ----------
+        chunks : Iterator[List[UpdateOne]]
+        max_workers : int
+
+        Returns
+        -------
+        Iterator[BulkWriteResult]
+          The result of each batch, in the order the batches were read.
+
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as ex:
+            in_flight = deque()
+            for chunk in chunks:
+                if len(in_flight) == max_workers:
+                    yield in_flight.popleft().result()
+                in_flight.append(
+                    ex.submit(self.collection.bulk_write, chunk, ordered=False)
+                )
+            while in_flight:
+                yield in_flight.popleft().result()
+
+    def insert_many_records(
+        self,
+        data_asset_records: Iterable[DataAssetRecord],
+        batch_size: int = 1000,
+        ordered: bool = False,
+    ) -> None:
+        """
+        Insert records that are known to be new into the Document Store.
+        This skips the lookup of an existing _id that an upsert requires.
+        A record whose _id already exists raises a BulkWriteError, in which
+        case upsert_list_of_records can be used instead.
+        Parameters
+        ----------
+        data_asset_records : Iterable[DataAssetRecord]
+        batch_size : int
+          Max number of records to send in a single insert_many. Default is
+          1000.
+        ordered : bool
+          If False, the server may insert the records in any order and
+          continues past individual failures. Default is False.
+
+        Returns
+        -------
+        None
+
+        """
+        documents = (
+            rec.model_dump(mode="json", by_alias=True)
+            for rec in data_asset_records
+        )
+        inserted_count = 0
+        while True:
+            chunk = list(islice(documents, batch_size))
+            if not chunk:
+                break
+            insert_response = self.collection.insert_many(
+                chunk, ordered=ordered
+            )
+            inserted_count += len(insert_response.inserted_ids)
+        logging.info("Inserted %d records.", inserted_count)
@@ -2,11 +2,10 @@
 
 from aind_data_access_api.document_db import MetadataDbClient
 from aind_data_access_api.helpers.docdb import (
-    get_field_by_id,
-    get_id_from_name,
+    get_field_by_name,
+    get_required_field_by_id,
 )
 from aind_data_schema.core.quality_control import QualityControl
-import json
 
 
 def get_quality_control_by_id(
@@ -26,13 +25,10 @@ def get_quality_control_by_id(
     allow_invalid : bool, optional
         return invalid QualityControl as dict if True, by default False
     """
-    record = get_field_by_id(client, _id=_id, field="quality_control")
-    if not record:
-        raise ValueError(f"No record found with id {_id}")
-
-    if "quality_control" not in record or not record["quality_control"]:
+    record = get_required_field_by_id(client, _id=_id, field="quality_control")
+    if not record or not record.get("quality_control"):
         raise ValueError(
-            f"No quality_control field found in record with id {_id}"
+            f"No record with a quality_control field found with id {_id}"
         )
 
     return validate_qc(record["quality_control"], allow_invalid=allow_invalid)
@@ -55,20 +51,23 @@ def get_quality_control_by_name(
     allow_invalid : bool, optional
         return invalid QualityControl as dict if True, by default False
     """
-    _id = get_id_from_name(client, name=name)
-    if not _id:
+    record = get_field_by_name(client, name=name, field="quality_control")
+    if not record:
         raise ValueError(f"No record found with name {name}")
 
-    return get_quality_control_by_id(
-        client, _id=_id, allow_invalid=allow_invalid
-    )
+    if "quality_control" not in record or not record["quality_control"]:
+        raise ValueError(
+            f"No quality_control field found in record with name {name}"
+        )
+
+    return validate_qc(record["quality_control"], allow_invalid=allow_invalid)
 
 
 def validate_qc(qc_data: dict, allow_invalid: bool = False):
     """Validate a quality control dict."""
 
     try:
-        return QualityControl.model_validate_json(json.dumps(qc_data))
+        return QualityControl.model_validate(qc_data)
     except Exception as e:
         if allow_invalid:
             return qc_data
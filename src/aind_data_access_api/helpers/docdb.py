@@ -80,6 +80,76 @@ def get_field_by_id(
     return get_projection_by_id(client, _id=_id, projection={field: 1})
 
 
+def get_required_field_by_id(
+    client: MetadataDbClient,
+    _id: str,
+    field: str,
+) -> Optional[dict]:
+    """Download a single field from docdb using the record _id, only if the
+    field is set. The check is done by the server, so no record is sent back
+    when the field is missing, null, or an empty dict.
+
+    Parameters
+    ----------
+    client : MetadataDbClient
+    _id : str
+    field : str
+
+    Returns
+    -------
+    Optional[dict]
+        None if a record does not exist or its field is missing, null, or an
+        empty dict. Otherwise returns the field in a dict.
+    """
+    records = client.retrieve_docdb_records(
+        filter_query={"_id": _id, field: {"$nin": [None, {}]}},
+        projection={field: 1},
+        limit=1,
+    )
+    if len(records) > 0:
+        return records[0]
+    else:
+        return None
+
+
+def get_field_by_name(
+    client: MetadataDbClient,
+    name: str,
+    field: str,
+) -> Optional[dict]:
+    """Download a single field from docdb using the record name. This is a
+    single query, rather than looking up the _id first.
+
+    Parameters
+    ----------
+    client : MetadataDbClient
+    name : str
+    field : str
+
+    Returns
+    -------
+    Optional[dict]
+        None if a record does not exist. Otherwise returns the _id and the
+        field in a dict.
+    """
+    # Two records are enough to tell whether the name is shared
+    records = client.retrieve_docdb_records(
+        filter_query={"name": name}, projection={field: 1, "_id": 1}, limit=2
+    )
+
+    if len(records) > 1:
+        logging.warning(
+            "Multiple records share the name %s, "
+            "only the first record will be returned.",
+            name,
+        )
+
+    if len(records) > 0:
+        return records[0]
+    else:
+        return None
+
+
 def get_id_from_name(
     client: MetadataDbClient,
     name: str,
@@ -98,14 +168,16 @@ def get_id_from_name(
         None if record does not exist. Otherwise, it will return the _id of
         the record.
     """
+    # Two records are enough to tell whether the name is shared
     records = client.retrieve_docdb_records(
-        filter_query={"name": name}, projection={"_id": 1}, limit=0
+        filter_query={"name": name}, projection={"_id": 1}, limit=2
     )
 
     if len(records) > 1:
         logging.warning(
-            "Multiple records share the name {name}, ",
+            "Multiple records share the name %s, "
             "only the first record will be returned.",
+            name,
         )
 
     if len(records) > 0:
@@ -1,5 +1,7 @@
 """Module to interface with the Relational Database"""
 
+from functools import cached_property
+from io import StringIO
 from typing import Optional, Union
 
 import pandas as pd
@@ -66,10 +68,13 @@ class Client:
         self.credentials = credentials
         self.drivername = drivername
 
-    @property
+    @cached_property
     def _engine(self) -> sqlalchemy.engine.Engine:
         """Create a sqlalchemy engine:
         https://docs.sqlalchemy.org/en/20/core/engines.html
+        The engine is created once per client, so its connection pool is
+        reused across calls. Pooled connections are checked before use and
+        recycled after an hour, so stale connections are not handed out.
 
         Returns: sqlalchemy.engine.Engine
         """
@@ -81,13 +86,85 @@ class Client:
             database=self.credentials.database,
             port=self.credentials.port,
         )
-        return create_engine(connection_url)
+        return create_engine(
+            connection_url, pool_pre_ping=True, pool_recycle=3600
+        )
+
+    def _copy_df(
+        self,
+        df: pd.DataFrame,
+        table_name: str,
+        if_exists: str,
+        dtype: Optional[Union[dict, str]] = None,
+    ) -> None:
+        """
+        Load a dataframe into a table with a single PostgreSQL COPY ... FROM
+        STDIN. to_sql still creates, replaces, or appends to the table, so
+        column types are inferred from the full dataframe as usual, but the
+        rows are serialized with pandas' to_csv and sent with COPY instead of
+        INSERT. Both steps run in one transaction. Requires a DBAPI with
+        copy_expert, such as psycopg2. Redshift does not support COPY FROM
+        STDIN.
+        Parameters
+        ----------
+        df : pd.Dataframe
+        table_name : str
+        if_exists : str
+          Passed to to_sql, either "append" or "replace".
+        dtype: Optional[Union[dict, str]]
+
+        Returns
+        -------
+        None
+
+        """
+
+        def copy_rows(table, conn, keys, data_iter) -> None:
+            """Insert method for to_sql. It is called once with every row
+            since no chunksize is set, so the whole dataframe is written with
+            to_csv and the row iterator from pandas is not used."""
+            buffer = StringIO()
+            df.to_csv(
+                buffer,
+                index=False,
+                header=False,
+                na_rep="\\N",
+                lineterminator="\n",
+            )
+            buffer.seek(0)
+            # Quote identifiers the same way the dialect quoted them when
+            # to_sql created the table
+            preparer = conn.dialect.identifier_preparer
+            name = preparer.quote(table.name)
+            columns = ", ".join(preparer.quote(k) for k in keys)
+            with conn.connection.cursor() as cur:
+                cur.copy_expert(
+                    sql=(
+                        f"COPY {name} ({columns}) FROM STDIN "
+                        "WITH (FORMAT CSV, NULL '\\N')"
+                    ),
+                    file=buffer,
+                )
+
+        with self._engine.begin() as conn:
+            # to_sql method has types str | None, but also allows for
+            # callable. Suppressing type check warning.
+            # noinspection PyTypeChecker
+            df.to_sql(
+                name=table_name,
+                con=conn,
+                dtype=dtype,
+                method=copy_rows,
+                if_exists=if_exists,
+                index=False,
+            )
 
     def append_df_to_table(
         self,
         df: pd.DataFrame,
         table_name: str,
         dtype: Optional[Union[dict, str]] = None,
+        use_copy: bool = False,
     ) -> None:
         """
         Append a dataframe to an existing table.
@@ -96,12 +173,21 @@ class Client:
         df : pd.Dataframe
         table_name : str
         dtype: Optional[Union[dict, str]]
+        use_copy : bool
+          If True, rows are loaded with PostgreSQL COPY FROM STDIN, which is
+          much faster than INSERT for large dataframes. Not supported by
+          Redshift. Default is False.
 
         Returns
         -------
         None
 
         """
+        if use_copy:
+            self._copy_df(
+                df, table_name=table_name, if_exists="append", dtype=dtype
+            )
+            return None
         # to_sql method has types str | None, but also allows for callable
         # Suppressing type check warning.
         # noinspection PyTypeChecker
@@ -120,6 +206,7 @@ class Client:
         df: pd.DataFrame,
         table_name: str,
         dtype: Optional[Union[dict, str]] = None,
+        use_copy: bool = False,
     ) -> None:
         """
         Overwrite an existing table with a dataframe.
@@ -128,11 +215,20 @@ class Client:
         df : pd.Dataframe
         table_name : str
         dtype: Optional[Union[dict, str]]
+        use_copy : bool
+          If True, rows are loaded with PostgreSQL COPY FROM STDIN, which is
+          much faster than INSERT for large dataframes. Not supported by
+          Redshift. Default is False.
 
         Returns
         -------
         None
         """
+        if use_copy:
+            self._copy_df(
+                df, table_name=table_name, if_exists="replace", dtype=dtype
+            )
+            return None
         # to_sql method has types str | None, but also allows for callable
         # Suppressing type check warning.
         # noinspection PyTypeChecker
@@ -154,6 +154,8 @@ def paginate_docdb(
     collection_name : str
     docdb_client : MongoClient
     page_size : int
+      Number of records per page. The cursor also fetches this many records
+      per round-trip, so each page needs a single batch from the server.
       Default is 1000
     filter_query : Optional[dict]
     projection : Optional[dict]
@@ -169,7 +171,9 @@ def paginate_docdb(
         projection = {}
     db = docdb_client[db_name]
     collection = db[collection_name]
-    cursor = collection.find(filter=filter_query, projection=projection)
+    cursor = collection.find(
+        filter=filter_query, projection=projection, batch_size=page_size
+    )
     obj = next(cursor, None)
     while obj:
         page = []
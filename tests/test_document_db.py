@@ -1,20 +1,89 @@
 """Test document_db module."""
 
 import json
+import math
+import threading
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from unittest.mock import MagicMock, call, patch
 
+from botocore.auth import SigV4Auth
+from botocore.awsrequest import AWSRequest
+from botocore.credentials import Credentials
 from requests import Response
 
 from aind_data_access_api.document_db import (
     Client,
     MetadataDbClient,
     SchemaDbClient,
+    _CachedSigV4Auth,
+    _dumps,
 )
 from aind_data_access_api.models import DataAssetRecord
 
 
+class TestCachedSigV4Auth(unittest.TestCase):
+    """Test methods in _CachedSigV4Auth class."""
+
+    def test_signature(self):
+        """Tests that the cached signing key gives the same signature as
+        botocore"""
+        credentials = Credentials(access_key="abc", secret_key="efg")
+        aws_request = AWSRequest(
+            url="https://acmecorp.com/v1/db/coll/update_one",
+            method="POST",
+            data=b'{"filter": {"_id": "123"}}',
+            headers={"Content-Type": "application/json"},
+        )
+        aws_request.context["timestamp"] = "20240101T000000Z"
+        string_to_sign = "AWS4-HMAC-SHA256\n20240101T000000Z\nscope\nhash"
+        expected_signature = SigV4Auth(
+            credentials, "execute-api", "us-west-2"
+        ).signature(string_to_sign, aws_request)
+        cached_auth = _CachedSigV4Auth(credentials, "execute-api", "us-west-2")
+        self.assertEqual(
+            expected_signature,
+            cached_auth.signature(string_to_sign, aws_request),
+        )
+        signing_key = cached_auth._signing_key
+        self.assertEqual(("20240101", "abc"), signing_key[0])
+        self.assertEqual(
+            expected_signature,
+            cached_auth.signature(string_to_sign, aws_request),
+        )
+        self.assertIs(signing_key, cached_auth._signing_key)
+
+    def test_signature_new_day_and_credentials(self):
+        """Tests that the signing key is derived again when the date or the
+        credentials change"""
+        credentials = Credentials(access_key="abc", secret_key="efg")
+        aws_request = AWSRequest(
+            url="https://acmecorp.com/v1/db/coll/update_one", method="POST"
+        )
+        string_to_sign = "AWS4-HMAC-SHA256\n20240102T000000Z\nscope\nhash"
+        cached_auth = _CachedSigV4Auth(credentials, "execute-api", "us-west-2")
+        aws_request.context["timestamp"] = "20240101T000000Z"
+        cached_auth.signature(string_to_sign, aws_request)
+        aws_request.context["timestamp"] = "20240102T000000Z"
+        self.assertEqual(
+            SigV4Auth(credentials, "execute-api", "us-west-2").signature(
+                string_to_sign, aws_request
+            ),
+            cached_auth.signature(string_to_sign, aws_request),
+        )
+        self.assertEqual(("20240102", "abc"), cached_auth._signing_key[0])
+        rotated = Credentials(access_key="hij", secret_key="klm")
+        cached_auth.credentials = rotated
+        self.assertEqual(
+            SigV4Auth(rotated, "execute-api", "us-west-2").signature(
+                string_to_sign, aws_request
+            ),
+            cached_auth.signature(string_to_sign, aws_request),
+        )
+        self.assertEqual(("20240102", "hij"), cached_auth._signing_key[0])
+
+
 class TestClient(unittest.TestCase):
     """Test methods in Client class."""
 
@@ -41,7 +110,63 @@ class TestClient(unittest.TestCase):
             client._bulk_write_url,
         )
 
-    @patch("requests.get")
+    def test_urls_follow_reassigned_attributes(self):
+        """Tests that cached urls are built again when the host, database,
+        or collection is set on an existing client"""
+        client = Client(**self.example_client_args)
+        self.assertEqual("https://acmecorp.com/v1/db/coll", client._base_url)
+        self.assertEqual(
+            "https://acmecorp.com/v1/db/coll/delete_many",
+            client._delete_many_url,
+        )
+
+        client.collection = "other_coll"
+        self.assertEqual(
+            "https://acmecorp.com/v1/db/other_coll", client._base_url
+        )
+        self.assertEqual(
+            "https://acmecorp.com/v1/db/other_coll/delete_many",
+            client._delete_many_url,
+        )
+        client.host = "example.com"
+        client.database = "other_db"
+        self.assertEqual(
+            "https://example.com/v1/other_db/other_coll/aggregate",
+            client._aggregate_url,
+        )
+
+    def test_session(self):
+        """Tests that a single pooled session is reused"""
+        client = Client(**self.example_client_args)
+        session = client._session
+        adapter = session.get_adapter("https://acmecorp.com")
+
+        self.assertIs(session, client._session)
+        self.assertEqual(20, adapter._pool_maxsize)
+        self.assertEqual(3, adapter.max_retries.total)
+        self.assertEqual(
+            [429, 502, 503, 504], adapter.max_retries.status_forcelist
+        )
+        self.assertEqual(["GET"], adapter.max_retries.allowed_methods)
+
+    def test_encode_query_params(self):
+        """Tests that query params are encoded as json"""
+        query_params = Client._encode_query_params(
+            filter_query={"_id": "abc"},
+            projection={"name": 1},
+            sort=[("name", 1)],
+        )
+        self.assertEqual(
+            {
+                "filter": '{"_id": "abc"}',
+                "projection": '{"name": 1}',
+                "sort": '[["name", 1]]',
+            },
+            query_params,
+        )
+        self.assertEqual({}, Client._encode_query_params())
+
+    @patch("requests.Session.get")
     def test_count_records(self, mock_get: MagicMock):
         """Tests _count_records method"""
 
@@ -62,7 +187,20 @@ class TestClient(unittest.TestCase):
             record_count,
         )
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
+    def test_count_records_non_finite(self, mock_get: MagicMock):
+        """Tests that a body holding NaN and Infinity can be parsed"""
+
+        client = Client(**self.example_client_args)
+        mock_response = Response()
+        mock_response.status_code = 200
+        mock_response._content = b'{"a": NaN, "b": -Infinity}'
+        mock_get.return_value = mock_response
+        record_count = client._count_records(filter_query={"_id": "abc"})
+        self.assertTrue(math.isnan(record_count["a"]))
+        self.assertEqual(float("-inf"), record_count["b"])
+
+    @patch("requests.Session.get")
     def test_count_records_error(self, mock_get: MagicMock):
         """Tests _count_records when there is a HTTP error"""
         client = Client(**self.example_client_args)
@@ -78,7 +216,7 @@ class TestClient(unittest.TestCase):
             repr(e.exception),
         )
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_get_records(self, mock_get: MagicMock):
         """Tests _get_records method"""
 
@@ -116,7 +254,7 @@ class TestClient(unittest.TestCase):
         )
         self.assertEqual([{"_id": "abc123", "message": "hi"}], records2)
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_get_records_error(self, mock_get: MagicMock):
         """Tests _get_records method when there is an HTTP error or
         no payload in response"""
@@ -146,7 +284,7 @@ class TestClient(unittest.TestCase):
             "ValueError('No payload in response')", repr(e.exception)
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_aggregate_records(self, mock_post: MagicMock):
         """Tests _aggregate_records method"""
         pipeline = [{"$match": {"_id": "abc123"}}]
@@ -164,7 +302,7 @@ class TestClient(unittest.TestCase):
             result,
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_aggregate_records_error(self, mock_post: MagicMock):
         """Tests _aggregate_records method when there is an HTTP error or
         no payload in response"""
@@ -199,10 +337,24 @@ class TestClient(unittest.TestCase):
 
     @patch("boto3.session.Session")
     @patch("botocore.auth.SigV4Auth.add_auth")
-    @patch("requests.post")
+    def test_signed_request_reuses_auth(
+        self, mock_auth: MagicMock, mock_session: MagicMock
+    ):
+        """Tests that credentials are fetched once across signed requests"""
+        mock_session.return_value.region_name = "us-west-2"
+
+        client = Client(**self.example_client_args)
+        client._signed_request(url=client._update_one_url, method="POST")
+        client._signed_request(url=client._bulk_write_url, method="POST")
+        self.assertEqual(2, mock_auth.call_count)
+        mock_session.return_value.get_credentials.assert_called_once()
+
+    @patch("boto3.session.Session")
+    @patch("botocore.auth.SigV4Auth.add_auth")
+    @patch("requests.Session.request")
     def test_upsert_one_record(
         self,
-        mock_post: MagicMock,
+        mock_request: MagicMock,
         mock_auth: MagicMock,
         mock_session: MagicMock,
     ):
@@ -219,22 +371,104 @@ class TestClient(unittest.TestCase):
             update={"$set": {"_id": "123", "message": "hi"}},
         )
         mock_auth.assert_called_once()
-        mock_post.assert_called_once_with(
+        mock_request.assert_called_once_with(
+            method="POST",
             url="https://acmecorp.com/v1/db/coll/update_one",
             headers={"Content-Type": "application/json"},
             data=(
-                '{"filter": {"_id": "123"},'
-                ' "update": {"$set": {"_id": "123", "message": "hi"}},'
-                ' "upsert": "True"}'
+                b'{"filter":{"_id":"123"},'
+                b'"update":{"$set":{"_id":"123","message":"hi"}},'
+                b'"upsert":"True"}'
             ),
         )
 
     @patch("boto3.session.Session")
     @patch("botocore.auth.SigV4Auth.add_auth")
-    @patch("requests.post")
+    @patch("requests.Session.request")
+    def test_upsert_one_record_datetime(
+        self,
+        mock_request: MagicMock,
+        mock_auth: MagicMock,
+        mock_session: MagicMock,
+    ):
+        """Tests that datetimes are encoded with the envelope"""
+        mock_session.return_value.region_name = "us-west-2"
+
+        client = Client(**self.example_client_args)
+        client._upsert_one_record(
+            record_filter={"_id": "123"},
+            update={"$set": {"created": datetime(2000, 10, 10, 10, 10, 10)}},
+        )
+        self.assertEqual(
+            (
+                b'{"filter":{"_id":"123"},'
+                b'"update":{"$set":{"created":"2000-10-10 10:10:10"}},'
+                b'"upsert":"True"}'
+            ),
+            mock_request.call_args.kwargs["data"],
+        )
+
+    @patch("boto3.session.Session")
+    @patch("botocore.auth.SigV4Auth.add_auth")
+    @patch("requests.Session.request")
+    def test_upsert_one_record_non_finite_and_big_int(
+        self,
+        mock_request: MagicMock,
+        mock_auth: MagicMock,
+        mock_session: MagicMock,
+    ):
+        """Tests that NaN, Infinity, and integers wider than 64 bits are
+        encoded the same way json.dumps encodes them instead of being
+        dropped or rejected"""
+        mock_session.return_value.region_name = "us-west-2"
+
+        client = Client(**self.example_client_args)
+        client._upsert_one_record(
+            record_filter={"_id": "123"},
+            update={
+                "$set": {
+                    "a": None,
+                    "b": [float("nan"), float("-inf")],
+                    "c": 1.5,
+                }
+            },
+        )
+        client._upsert_one_record(
+            record_filter={"_id": "123"},
+            update={"$set": {"big": 2**64}},
+        )
+        client._upsert_one_record(
+            record_filter={"_id": "123"},
+            update={"$set": {"a": None, "b": [1.5]}},
+        )
+        self.assertEqual(
+            [
+                (
+                    b'{"filter": {"_id": "123"}, '
+                    b'"update": {"$set": {"a": null, '
+                    b'"b": [NaN, -Infinity], "c": 1.5}}, '
+                    b'"upsert": "True"}'
+                ),
+                (
+                    b'{"filter": {"_id": "123"}, '
+                    b'"update": {"$set": {"big": 18446744073709551616}}, '
+                    b'"upsert": "True"}'
+                ),
+                (
+                    b'{"filter":{"_id":"123"},'
+                    b'"update":{"$set":{"a":null,"b":[1.5]}},'
+                    b'"upsert":"True"}'
+                ),
+            ],
+            [c.kwargs["data"] for c in mock_request.call_args_list],
+        )
+
+    @patch("boto3.session.Session")
+    @patch("botocore.auth.SigV4Auth.add_auth")
+    @patch("requests.Session.request")
     def test_bulk_write(
         self,
-        mock_post: MagicMock,
+        mock_request: MagicMock,
         mock_auth: MagicMock,
         mock_session: MagicMock,
     ):
@@ -264,27 +498,28 @@ class TestClient(unittest.TestCase):
         ]
         client._bulk_write(operations=operations)
         mock_auth.assert_called_once()
-        mock_post.assert_called_once_with(
+        mock_request.assert_called_once_with(
+            method="POST",
             url="https://acmecorp.com/v1/db/coll/bulk_write",
             headers={"Content-Type": "application/json"},
             data=(
-                '[{"UpdateOne":'
-                ' {"filter": {"_id": "abc123"},'
-                ' "update": {"$set": {"notes": "hi"}},'
-                ' "upsert": "True"}}, '
-                '{"UpdateOne":'
-                ' {"filter": {"_id": "abc124"},'
-                ' "update": {"$set": {"notes": "hi again"}},'
-                ' "upsert": "True"}}]'
+                b'[{"UpdateOne":'
+                b'{"filter":{"_id":"abc123"},'
+                b'"update":{"$set":{"notes":"hi"}},'
+                b'"upsert":"True"}},'
+                b'{"UpdateOne":'
+                b'{"filter":{"_id":"abc124"},'
+                b'"update":{"$set":{"notes":"hi again"}},'
+                b'"upsert":"True"}}]'
             ),
         )
 
     @patch("boto3.session.Session")
     @patch("botocore.auth.SigV4Auth.add_auth")
-    @patch("requests.delete")
+    @patch("requests.Session.request")
     def test_delete_one_record(
         self,
-        mock_delete: MagicMock,
+        mock_request: MagicMock,
         mock_auth: MagicMock,
         mock_session: MagicMock,
     ):
@@ -298,18 +533,19 @@ class TestClient(unittest.TestCase):
         client = Client(**self.example_client_args)
         client._delete_one_record(record_filter={"_id": "123"})
         mock_auth.assert_called_once()
-        mock_delete.assert_called_once_with(
+        mock_request.assert_called_once_with(
+            method="DELETE",
             url="https://acmecorp.com/v1/db/coll/delete_one",
             headers={"Content-Type": "application/json"},
-            data=('{"filter": {"_id": "123"}}'),
+            data=(b'{"filter":{"_id":"123"}}'),
         )
 
     @patch("boto3.session.Session")
     @patch("botocore.auth.SigV4Auth.add_auth")
-    @patch("requests.delete")
+    @patch("requests.Session.request")
     def test_delete_many_records(
         self,
-        mock_delete: MagicMock,
+        mock_request: MagicMock,
         mock_auth: MagicMock,
         mock_session: MagicMock,
     ):
@@ -325,13 +561,28 @@ class TestClient(unittest.TestCase):
             record_filter={"_id": {"$in": ["123", "456"]}}
         )
         mock_auth.assert_called_once()
-        mock_delete.assert_called_once_with(
+        mock_request.assert_called_once_with(
+            method="DELETE",
             url="https://acmecorp.com/v1/db/coll/delete_many",
             headers={"Content-Type": "application/json"},
-            data=('{"filter": {"_id": {"$in": ["123", "456"]}}}'),
+            data=(b'{"filter":{"_id":{"$in":["123","456"]}}}'),
         )
 
 
+def _pages_by_skip(pages: dict):
+    """Side effect for _get_records that returns the page for a skip, since
+    pages can be requested concurrently and in any order"""
+
+    def get_page(**kwargs):
+        """Return or raise the page mapped to the skip value"""
+        page = pages[kwargs["skip"]]
+        if isinstance(page, Exception):
+            raise page
+        return page
+
+    return get_page
+
+
 class TestMetadataDbClient(unittest.TestCase):
     """Test methods in MetadataDbClient class."""
 
@@ -341,12 +592,14 @@ class TestMetadataDbClient(unittest.TestCase):
         "collection": "data_assets",
     }
 
+    @patch("aind_data_access_api.document_db.Client._get_records_from_params")
     @patch("aind_data_access_api.document_db.Client._get_records")
     @patch("aind_data_access_api.document_db.Client._count_records")
     def test_retrieve_docdb_records(
         self,
         mock_count_record_response: MagicMock,
         mock_get_record_response: MagicMock,
+        mock_get_page: MagicMock,
     ):
         """Tests retrieving docdb records"""
 
@@ -361,25 +614,23 @@ class TestMetadataDbClient(unittest.TestCase):
             }
         ]
         mock_get_record_response.return_value = expected_response
-        mock_count_record_response.return_value = {
-            "total_record_count": 1,
-            "filtered_record_count": 1,
-        }
+        mock_get_page.return_value = mock_get_record_response.return_value
         records = client.retrieve_docdb_records()
         paginate_records = client.retrieve_docdb_records(paginate=False)
         self.assertEqual(expected_response, records)
         self.assertEqual(expected_response, paginate_records)
+        # A first page that is not full does not need a count
+        mock_count_record_response.assert_not_called()
 
-    @patch("aind_data_access_api.document_db.Client._get_records")
+    @patch("aind_data_access_api.document_db.Client._get_records_from_params")
     @patch("aind_data_access_api.document_db.Client._count_records")
-    @patch("logging.error")
     def test_retrieve_many_docdb_records(
         self,
-        mock_log_error: MagicMock,
         mock_count_record_response: MagicMock,
         mock_get_record_response: MagicMock,
     ):
-        """Tests retrieving many docdb records"""
+        """Tests that a page that cannot be retrieved raises an error instead
+        of silently truncating the records"""
 
         client = MetadataDbClient(**self.example_client_args)
         mocked_record_list = [
@@ -392,40 +643,206 @@ class TestMetadataDbClient(unittest.TestCase):
             }
             for id_num in range(0, 10)
         ]
-        mock_get_record_response.side_effect = [
-            mocked_record_list[0:2],
-            Exception("Test"),
-            mocked_record_list[4:6],
-            mocked_record_list[6:8],
-            mocked_record_list[8:10],
-        ]
+        mock_get_record_response.side_effect = _pages_by_skip(
+            {
+                0: mocked_record_list[0:2],
+                2: Exception("Test"),
+                4: mocked_record_list[4:6],
+                6: mocked_record_list[6:8],
+                8: mocked_record_list[8:10],
+            }
+        )
         mock_count_record_response.return_value = {
             "total_record_count": len(mocked_record_list),
             "filtered_record_count": len(mocked_record_list),
         }
-        expected_response = [
-            {
-                "_id": f"{id_num}",
-                "name": "modal_00000_2000-10-10_10-10-10",
-                "location": "some_url",
-                "created": datetime(2000, 10, 10, 10, 10, 10),
-                "subject": {"subject_id": "00000", "sex": "Female"},
-            }
-            for id_num in [0, 1, 4, 5, 6, 7, 8, 9]
+        with self.assertRaises(Exception) as e:
+            client.retrieve_docdb_records(paginate_batch_size=2)
+        self.assertEqual("Exception('Test')", repr(e.exception))
+
+    @patch("aind_data_access_api.document_db.Client._get_records_from_params")
+    @patch("aind_data_access_api.document_db.Client._count_records")
+    def test_retrieve_docdb_records_with_limit(
+        self,
+        mock_count_record_response: MagicMock,
+        mock_get_record_response: MagicMock,
+    ):
+        """Tests that paginated records are trimmed to the limit"""
+
+        client = MetadataDbClient(**self.example_client_args)
+        mocked_record_list = [{"_id": f"{id_num}"} for id_num in range(0, 10)]
+        mock_get_record_response.side_effect = _pages_by_skip(
+            {0: mocked_record_list[0:4], 4: mocked_record_list[4:8]}
+        )
+        mock_count_record_response.return_value = {
+            "total_record_count": len(mocked_record_list),
+            "filtered_record_count": len(mocked_record_list),
+        }
+        records = client.retrieve_docdb_records(limit=5, paginate_batch_size=4)
+        self.assertEqual(mocked_record_list[0:5], records)
+        self.assertEqual(2, mock_get_record_response.call_count)
+        # A limit that fits in the first page does not need a count
+        mock_count_record_response.reset_mock()
+        records = client.retrieve_docdb_records(limit=4, paginate_batch_size=4)
+        self.assertEqual(mocked_record_list[0:4], records)
+        mock_count_record_response.assert_not_called()
+
+    @patch("aind_data_access_api.document_db.Client._get_records_from_params")
+    @patch("aind_data_access_api.document_db.Client._count_records")
+    def test_retrieve_docdb_records_max_iterations(
+        self,
+        mock_count_record_response: MagicMock,
+        mock_get_record_response: MagicMock,
+    ):
+        """Tests that pagination stops after paginate_max_iterations"""
+
+        client = MetadataDbClient(**self.example_client_args)
+        mocked_record_list = [{"_id": f"{id_num}"} for id_num in range(0, 10)]
+        mock_get_record_response.side_effect = _pages_by_skip(
+            {0: mocked_record_list[0:2], 2: mocked_record_list[2:4]}
+        )
+        mock_count_record_response.return_value = {
+            "total_record_count": len(mocked_record_list),
+            "filtered_record_count": len(mocked_record_list),
+        }
+        records = client.retrieve_docdb_records(
+            filter_query={"subject.subject_id": "00000"},
+            paginate_batch_size=2,
+            paginate_max_iterations=2,
+        )
+        self.assertEqual(mocked_record_list[0:4], records)
+        self.assertEqual(2, mock_get_record_response.call_count)
+        query_params = {"filter": '{"subject.subject_id": "00000"}'}
+        mock_get_record_response.assert_has_calls(
+            [
+                call(query_params=query_params, limit=2, skip=0),
+                call(query_params=query_params, limit=2, skip=2),
+            ],
+            any_order=True,
+        )
+
+    @patch("aind_data_access_api.document_db.Client._get_records")
+    @patch("aind_data_access_api.document_db.Client._count_records")
+    def test_retrieve_docdb_records_by_id(
+        self,
+        mock_count_record_response: MagicMock,
+        mock_get_record_response: MagicMock,
+    ):
+        """Tests paginating records with an _id cursor"""
+
+        client = MetadataDbClient(**self.example_client_args)
+        mocked_record_list = [{"_id": f"{id_num}"} for id_num in range(0, 5)]
+        mock_get_record_response.side_effect = [
+            mocked_record_list[0:2],
+            mocked_record_list[2:4],
+            mocked_record_list[4:5],
         ]
-        records = client.retrieve_docdb_records(paginate_batch_size=2)
-        mock_log_error.assert_called_once_with(
-            "There were errors retrieving records. [\"Exception('Test')\"]"
+        records = client.retrieve_docdb_records(
+            filter_query={"subject.subject_id": "00000"},
+            paginate_batch_size=2,
+            paginate_by_id=True,
+        )
+        self.assertEqual(mocked_record_list, records)
+        mock_count_record_response.assert_not_called()
+        mock_get_record_response.assert_has_calls(
+            [
+                call(
+                    filter_query={"subject.subject_id": "00000"},
+                    projection=None,
+                    sort={"_id": 1},
+                    limit=2,
+                ),
+                call(
+                    filter_query={
+                        "$and": [
+                            {"subject.subject_id": "00000"},
+                            {"_id": {"$gt": "1"}},
+                        ]
+                    },
+                    projection=None,
+                    sort={"_id": 1},
+                    limit=2,
+                ),
+                call(
+                    filter_query={
+                        "$and": [
+                            {"subject.subject_id": "00000"},
+                            {"_id": {"$gt": "3"}},
+                        ]
+                    },
+                    projection=None,
+                    sort={"_id": 1},
+                    limit=2,
+                ),
+            ]
+        )
+
+    @patch("aind_data_access_api.document_db.Client._get_records")
+    def test_retrieve_docdb_records_by_id_with_limit(
+        self, mock_get_record_response: MagicMock
+    ):
+        """Tests paginating records with an _id cursor and a limit"""
+
+        client = MetadataDbClient(**self.example_client_args)
+        mocked_record_list = [{"_id": f"{id_num}"} for id_num in range(0, 5)]
+        mock_get_record_response.side_effect = [
+            mocked_record_list[0:2],
+            mocked_record_list[2:3],
+        ]
+        records = client.retrieve_docdb_records(
+            limit=3, paginate_batch_size=2, paginate_by_id=True
+        )
+        self.assertEqual(mocked_record_list[0:3], records)
+        mock_get_record_response.assert_has_calls(
+            [
+                call(
+                    filter_query=None,
+                    projection=None,
+                    sort={"_id": 1},
+                    limit=2,
+                ),
+                call(
+                    filter_query={"_id": {"$gt": "1"}},
+                    projection=None,
+                    sort={"_id": 1},
+                    limit=1,
+                ),
+            ]
+        )
+
+    @patch("aind_data_access_api.document_db.Client._get_records")
+    def test_retrieve_docdb_records_by_id_empty(
+        self, mock_get_record_response: MagicMock
+    ):
+        """Tests paginating by _id when no records match"""
+
+        client = MetadataDbClient(**self.example_client_args)
+        mock_get_record_response.return_value = []
+        records = client.retrieve_docdb_records(paginate_by_id=True)
+        self.assertEqual([], records)
+        mock_get_record_response.assert_called_once()
+
+    def test_retrieve_docdb_records_by_id_with_sort(self):
+        """Tests that sort cannot be combined with paginate_by_id"""
+
+        client = MetadataDbClient(**self.example_client_args)
+        with self.assertRaises(ValueError) as e:
+            client.retrieve_docdb_records(
+                sort={"name": 1}, paginate_by_id=True
+            )
+        self.assertEqual(
+            "sort cannot be set when paginate_by_id.", str(e.exception)
         )
-        self.assertEqual(expected_response, records)
 
     # TODO: remove this test
+    @patch("aind_data_access_api.document_db.Client._get_records_from_params")
     @patch("aind_data_access_api.document_db.Client._get_records")
     @patch("aind_data_access_api.document_db.Client._count_records")
     def test_retrieve_data_asset_records(
         self,
         mock_count_record_response: MagicMock,
         mock_get_record_response: MagicMock,
+        mock_get_page: MagicMock,
     ):
         """Tests retrieving data asset records"""
 
@@ -439,10 +856,7 @@ class TestMetadataDbClient(unittest.TestCase):
                 "subject": {"subject_id": "00000", "sex": "Female"},
             }
         ]
-        mock_count_record_response.return_value = {
-            "total_record_count": 1,
-            "filtered_record_count": 1,
-        }
+        mock_get_page.return_value = mock_get_record_response.return_value
         expected_response = [
             DataAssetRecord(
                 _id="abc-123",
@@ -456,18 +870,21 @@ class TestMetadataDbClient(unittest.TestCase):
         paginate_records = client.retrieve_data_asset_records(paginate=False)
         self.assertEqual(expected_response, list(records))
         self.assertEqual(expected_response, list(paginate_records))
+        # A first page that is not full does not need a count
+        mock_count_record_response.assert_not_called()
+        raw_records = client.retrieve_data_asset_records(coerce=False)
+        self.assertEqual(mock_get_record_response.return_value, raw_records)
 
     # TODO: remove this test
-    @patch("aind_data_access_api.document_db.Client._get_records")
+    @patch("aind_data_access_api.document_db.Client._get_records_from_params")
     @patch("aind_data_access_api.document_db.Client._count_records")
-    @patch("logging.error")
     def test_retrieve_many_data_asset_records(
         self,
-        mock_log_error: MagicMock,
         mock_count_record_response: MagicMock,
         mock_get_record_response: MagicMock,
     ):
-        """Tests retrieving many data asset records"""
+        """Tests that a page that cannot be retrieved raises an error instead
+        of silently truncating the data asset records"""
 
         client = MetadataDbClient(**self.example_client_args)
         mocked_record_list = [
@@ -480,32 +897,22 @@ class TestMetadataDbClient(unittest.TestCase):
             }
             for id_num in range(0, 10)
         ]
-        mock_get_record_response.side_effect = [
-            mocked_record_list[0:2],
-            Exception("Test"),
-            mocked_record_list[4:6],
-            mocked_record_list[6:8],
-            mocked_record_list[8:10],
-        ]
+        mock_get_record_response.side_effect = _pages_by_skip(
+            {
+                0: mocked_record_list[0:2],
+                2: Exception("Test"),
+                4: mocked_record_list[4:6],
+                6: mocked_record_list[6:8],
+                8: mocked_record_list[8:10],
+            }
+        )
         mock_count_record_response.return_value = {
             "total_record_count": len(mocked_record_list),
             "filtered_record_count": len(mocked_record_list),
         }
-        expected_response = [
-            DataAssetRecord(
-                _id=f"{id_num}",
-                _name="modal_00000_2000-10-10_10-10-10",
-                _created=datetime(2000, 10, 10, 10, 10, 10),
-                _location="some_url",
-                subject={"subject_id": "00000", "sex": "Female"},
-            )
-            for id_num in [0, 1, 4, 5, 6, 7, 8, 9]
-        ]
-        records = client.retrieve_data_asset_records(paginate_batch_size=2)
-        mock_log_error.assert_called_once_with(
-            "There were errors retrieving records. [\"Exception('Test')\"]"
-        )
-        self.assertEqual(expected_response, list(records))
+        with self.assertRaises(Exception) as e:
+            client.retrieve_data_asset_records(paginate_batch_size=2)
+        self.assertEqual("Exception('Test')", repr(e.exception))
 
     @patch("aind_data_access_api.document_db.Client._aggregate_records")
     def test_aggregate_docdb_records(self, mock_aggregate: MagicMock):
@@ -544,7 +951,7 @@ class TestMetadataDbClient(unittest.TestCase):
         self.assertEqual({"message": "success"}, response)
         mock_upsert.assert_called_once_with(
             record_filter={"_id": "abc-123"},
-            update={"$set": json.loads(json.dumps(record, default=str))},
+            update={"$set": record},
         )
 
     @patch("aind_data_access_api.document_db.Client._upsert_one_record")
@@ -600,7 +1007,7 @@ class TestMetadataDbClient(unittest.TestCase):
             },
         )
 
-    @patch("aind_data_access_api.document_db.Client._bulk_write")
+    @patch("aind_data_access_api.document_db.Client._bulk_write_payload")
     def test_upsert_list_of_docdb_records(self, mock_bulk_write: MagicMock):
         """Tests upserting a list of docdb records"""
 
@@ -625,33 +1032,27 @@ class TestMetadataDbClient(unittest.TestCase):
         response = client.upsert_list_of_docdb_records(records)
         self.assertEqual([{"message": "success"}], response)
         mock_bulk_write.assert_called_once_with(
-            [
-                {
-                    "UpdateOne": {
-                        "filter": {"_id": "abc-123"},
-                        "update": {
-                            "$set": json.loads(
-                                json.dumps(records[0], default=str)
-                            )
-                        },
-                        "upsert": "True",
-                    }
-                },
-                {
-                    "UpdateOne": {
-                        "filter": {"_id": "abc-125"},
-                        "update": {
-                            "$set": json.loads(
-                                json.dumps(records[1], default=str)
-                            )
-                        },
-                        "upsert": "True",
-                    }
-                },
-            ]
+            _dumps(
+                [
+                    {
+                        "UpdateOne": {
+                            "filter": {"_id": "abc-123"},
+                            "update": {"$set": records[0]},
+                            "upsert": "True",
+                        }
+                    },
+                    {
+                        "UpdateOne": {
+                            "filter": {"_id": "abc-125"},
+                            "update": {"$set": records[1]},
+                            "upsert": "True",
+                        }
+                    },
+                ]
+            )
         )
 
-    @patch("aind_data_access_api.document_db.Client._bulk_write")
+    @patch("aind_data_access_api.document_db.Client._bulk_write_payload")
     def test_upsert_empty_list_of_docdb_records(
         self, mock_bulk_write: MagicMock
     ):
@@ -664,7 +1065,7 @@ class TestMetadataDbClient(unittest.TestCase):
         self.assertEqual([], response)
         mock_bulk_write.assert_not_called()
 
-    @patch("aind_data_access_api.document_db.Client._bulk_write")
+    @patch("aind_data_access_api.document_db.Client._bulk_write_payload")
     def test_upsert_chunked_list_of_docdb_records(
         self, mock_bulk_write: MagicMock
     ):
@@ -698,39 +1099,108 @@ class TestMetadataDbClient(unittest.TestCase):
         mock_bulk_write.assert_has_calls(
             [
                 call(
-                    [
-                        {
-                            "UpdateOne": {
-                                "filter": {"_id": "abc-123"},
-                                "update": {
-                                    "$set": json.loads(
-                                        json.dumps(records[0], default=str)
-                                    )
-                                },
-                                "upsert": "True",
+                    _dumps(
+                        [
+                            {
+                                "UpdateOne": {
+                                    "filter": {"_id": "abc-123"},
+                                    "update": {"$set": records[0]},
+                                    "upsert": "True",
+                                }
                             }
-                        }
-                    ]
+                        ]
+                    )
                 ),
                 call(
-                    [
-                        {
-                            "UpdateOne": {
-                                "filter": {"_id": "abc-125"},
-                                "update": {
-                                    "$set": json.loads(
-                                        json.dumps(records[1], default=str)
-                                    )
-                                },
-                                "upsert": "True",
+                    _dumps(
+                        [
+                            {
+                                "UpdateOne": {
+                                    "filter": {"_id": "abc-125"},
+                                    "update": {"$set": records[1]},
+                                    "upsert": "True",
+                                }
                             }
-                        }
-                    ]
+                        ]
+                    )
                 ),
-            ]
+            ],
+            any_order=True,
         )
 
-    @patch("aind_data_access_api.document_db.Client._bulk_write")
+    @patch("aind_data_access_api.document_db.Client._bulk_write_payload")
+    def test_upsert_list_of_docdb_records_payload_bytes(
+        self, mock_bulk_write: MagicMock
+    ):
+        """Tests that chunks are packed by the encoded size of the records"""
+
+        client = MetadataDbClient(**self.example_client_args)
+        # Respond with the number of operations in the chunk to check
+        # responses keep chunk order
+        mock_bulk_write.side_effect = lambda data: len(json.loads(data))
+        records = [{"_id": f"abc-12{id_num}"} for id_num in range(0, 3)]
+        # Each record encodes to b'{"_id":"abc-12n"}', which is 17 bytes
+        response = client.upsert_list_of_docdb_records(
+            records, max_payload_size=34
+        )
+        self.assertEqual([2, 1], response)
+
+    @patch(
+        "aind_data_access_api.document_db.ThreadPoolExecutor",
+        wraps=ThreadPoolExecutor,
+    )
+    @patch("aind_data_access_api.document_db.Client._bulk_write_payload")
+    def test_upsert_list_of_docdb_records_max_workers(
+        self, mock_bulk_write: MagicMock, mock_executor: MagicMock
+    ):
+        """Tests that concurrent chunks are capped by the connection pool"""
+
+        client = MetadataDbClient(**self.example_client_args)
+        mock_bulk_write.return_value = {"message": "success"}
+        records = [{"_id": f"abc-{id_num}"} for id_num in range(0, 30)]
+        response = client.upsert_list_of_docdb_records(
+            records, max_payload_size=1, max_workers=50
+        )
+        self.assertEqual(30, len(response))
+        mock_executor.assert_called_once_with(max_workers=20)
+
+    @patch(
+        "aind_data_access_api.document_db.MetadataDbClient"
+        "._iter_bulk_write_payloads"
+    )
+    @patch("aind_data_access_api.document_db.Client._bulk_write_payload")
+    def test_upsert_list_of_docdb_records_in_flight(
+        self, mock_bulk_write: MagicMock, mock_iter_payloads: MagicMock
+    ):
+        """Tests that no more than max_workers chunks are encoded ahead of
+        the requests that send them"""
+
+        client = MetadataDbClient(**self.example_client_args)
+        encoded = []
+        started = []
+        lock = threading.Lock()
+
+        def iter_payloads(records, max_payload_size):
+            """Yield one payload per record, counting how many are encoded"""
+            for record in records:
+                encoded.append(record)
+                yield _dumps([record])
+
+        def bulk_write(data):
+            """Check that encoding has not run ahead of the requests"""
+            with lock:
+                started.append(data)
+                self.assertLessEqual(len(encoded), len(started) + 2)
+            return len(started)
+
+        mock_iter_payloads.side_effect = iter_payloads
+        mock_bulk_write.side_effect = bulk_write
+        records = [{"_id": f"abc-{id_num}"} for id_num in range(0, 10)]
+        response = client.upsert_list_of_docdb_records(records, max_workers=2)
+        self.assertEqual(10, len(response))
+        self.assertEqual(10, mock_bulk_write.call_count)
+
+    @patch("aind_data_access_api.document_db.Client._bulk_write_payload")
     def test_upsert_list_of_docdb_records_invalid_corrupt(
         self, mock_bulk_write: MagicMock
     ):
@@ -780,6 +1250,11 @@ class TestMetadataDbClient(unittest.TestCase):
         self.assertEqual(
             "A record is corrupt and cannot be upserted.", str(e.exception)
         )
+        # Earlier chunks are not sent if a later record is invalid
+        with self.assertRaises(ValueError):
+            client.upsert_list_of_docdb_records(
+                records_corrupt, max_payload_size=1
+            )
         mock_bulk_write.assert_not_called()
 
     # TODO: remove this test
@@ -986,6 +1461,26 @@ class TestMetadataDbClient(unittest.TestCase):
             record_filter={"_id": {"$in": ["abc-123", "def-456"]}},
         )
 
+    @patch("aind_data_access_api.document_db.Client._delete_many_records")
+    def test_delete_many_by_ids(self, mock_delete: MagicMock):
+        """Tests deleting records by ids in chunks"""
+        client = MetadataDbClient(**self.example_client_args)
+        successful_response = Response()
+        successful_response.status_code = 200
+        mock_delete.return_value = successful_response
+        responses = client.delete_many_by_ids(
+            ["abc-123", "def-456", "ghi-789"], chunk_size=2
+        )
+        self.assertEqual([successful_response] * 2, responses)
+        mock_delete.assert_has_calls(
+            [
+                call(record_filter={"_id": {"$in": ["abc-123", "def-456"]}}),
+                call(record_filter={"_id": {"$in": ["ghi-789"]}}),
+            ],
+            any_order=True,
+        )
+        self.assertEqual([], client.delete_many_by_ids([]))
+
 
 class TestSchemaDbClient(unittest.TestCase):
     """Test methods in SchemaDbClient"""
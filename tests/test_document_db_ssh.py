@@ -5,10 +5,14 @@ import unittest
 from unittest.mock import MagicMock, call, patch
 
 from bson import Timestamp
+from pymongo import UpdateOne
 
 from aind_data_access_api.document_db_ssh import (
+    _SHARED_CLIENTS,
+    _SHARED_CLIENTS_LOCK,
     DocumentDbSSHClient,
     DocumentDbSSHCredentials,
+    get_shared_client,
 )
 
 
@@ -145,6 +149,9 @@ class TestDocumentDbSSHClient(unittest.TestCase):
     ):
         """Tests start method."""
         mock_ssh_tunnel = MagicMock(is_active=False)
+        mock_ssh_tunnel.start.side_effect = lambda: self.assertFalse(
+            mock_create_mongo_client.called
+        )
         mock_create_ssh_tunnel.return_value = mock_ssh_tunnel
         mock_create_mongo_client.return_value = MagicMock(
             server_info=MagicMock(return_value=self.example_server_info),
@@ -160,6 +167,8 @@ class TestDocumentDbSSHClient(unittest.TestCase):
             password="doc_db_password",
             authSource="admin",
             authMechanism="SCRAM-SHA-1",
+            maxIdleTimeMS=60000,
+            compressors="zlib",
         )
         mock_create_ssh_tunnel.assert_called_once_with(
             ssh_address_or_host=("123.456.789.0", 22),
@@ -167,6 +176,7 @@ class TestDocumentDbSSHClient(unittest.TestCase):
             ssh_password="ssh_password",
             remote_bind_address=("doc_db_host", 27017),
             local_bind_address=("localhost", 27017),
+            set_keepalive=30.0,
         )
         mock_ssh_tunnel.start.assert_called_once()
         mock_log_info.assert_has_calls(
@@ -225,6 +235,8 @@ class TestDocumentDbSSHClient(unittest.TestCase):
             password="doc_db_password",
             authSource="admin",
             authMechanism="SCRAM-SHA-1",
+            maxIdleTimeMS=60000,
+            compressors="zlib",
         )
         mock_create_ssh_tunnel.assert_called_once_with(
             ssh_address_or_host=("123.456.789.0", 22),
@@ -232,6 +244,7 @@ class TestDocumentDbSSHClient(unittest.TestCase):
             ssh_password="ssh_password",
             remote_bind_address=("doc_db_host", 27017),
             local_bind_address=("localhost", 27017),
+            set_keepalive=30.0,
         )
         mock_ssh_tunnel.start.assert_called_once()
         # assert correct database and collection are accessed
@@ -249,6 +262,300 @@ class TestDocumentDbSSHClient(unittest.TestCase):
             ]
         )
 
+    @patch("aind_data_access_api.document_db_ssh.SSHTunnelForwarder")
+    @patch("aind_data_access_api.document_db_ssh.MongoClient")
+    @patch("logging.info")
+    def test_lazy_start(
+        self,
+        mock_log_info: MagicMock,
+        mock_create_mongo_client: MagicMock,
+        mock_create_ssh_tunnel: MagicMock,
+    ):
+        """Tests that the tunnel is started once, on first use"""
+        mock_ssh_tunnel = MagicMock(is_active=False)
+        mock_create_ssh_tunnel.return_value = mock_ssh_tunnel
+        mock_create_mongo_client.return_value = MagicMock(
+            server_info=MagicMock(return_value=self.example_server_info),
+        )
+        doc_db_client = DocumentDbSSHClient(credentials=self.credentials)
+        # Closing a client that was never started does nothing
+        doc_db_client.close()
+        mock_create_ssh_tunnel.assert_not_called()
+        doc_db_client.collection.count_documents({})
+        doc_db_client.start()
+        doc_db_client.collection.count_documents({})
+        mock_create_ssh_tunnel.assert_called_once()
+        mock_ssh_tunnel.start.assert_called_once()
+        doc_db_client.close()
+        self.assertIsNone(doc_db_client._client)
+        self.assertIsNone(doc_db_client._ssh_server)
+
+    def test_get_collection(self):
+        """Tests getting other collections through the same client"""
+        mock_mongo_client = MagicMock()
+        doc_db_client = DocumentDbSSHClient(credentials=self.credentials)
+        doc_db_client._client = mock_mongo_client
+        doc_db_client.get_collection("other_collection")
+        doc_db_client.get_collection("schemas", database_name="schema_db")
+        mock_mongo_client.__getitem__.assert_has_calls(
+            [
+                call("metadata_index"),
+                call().__getitem__("other_collection"),
+                call("schema_db"),
+                call().__getitem__("schemas"),
+            ]
+        )
+
+    def test_collection_follows_reassigned_names(self):
+        """Tests that the cached collection is looked up again when the
+        database or collection name is set on an existing client"""
+        mock_mongo_client = MagicMock()
+        doc_db_client = DocumentDbSSHClient(credentials=self.credentials)
+        doc_db_client._client = mock_mongo_client
+        collection = doc_db_client.collection
+        self.assertIs(collection, doc_db_client.collection)
+        doc_db_client.collection_name = "other_collection"
+        doc_db_client.collection
+        doc_db_client.database_name = "other_db"
+        doc_db_client.collection
+        mock_mongo_client.__getitem__.assert_has_calls(
+            [
+                call("metadata_index"),
+                call().__getitem__("data_assets"),
+                call("metadata_index"),
+                call().__getitem__("other_collection"),
+                call("other_db"),
+                call().__getitem__("other_collection"),
+            ]
+        )
+
+    def test_iter_collection(self):
+        """Tests iterating over a collection with a batched cursor"""
+        mock_cursor = MagicMock(
+            __iter__=MagicMock(
+                return_value=iter([{"_id": "abc-123"}, {"_id": "def-456"}])
+            )
+        )
+        mock_collection = MagicMock()
+        mock_collection.find.return_value = mock_cursor
+        doc_db_client = DocumentDbSSHClient(credentials=self.credentials)
+        doc_db_client._client = MagicMock(
+            __getitem__=MagicMock(
+                return_value=MagicMock(
+                    __getitem__=MagicMock(return_value=mock_collection)
+                )
+            )
+        )
+        records = doc_db_client.iter_collection(
+            projection={"name": 1}, batch_size=2
+        )
+        self.assertEqual({"_id": "abc-123"}, next(records))
+        mock_collection.find.assert_called_once_with({}, {"name": 1})
+        mock_cursor.batch_size.assert_called_once_with(2)
+        mock_cursor.close.assert_not_called()
+        self.assertEqual([{"_id": "def-456"}], list(records))
+        mock_cursor.close.assert_called_once()
+
+    def test_upsert_list_of_docdb_records(self):
+        """Tests upserting records in batches with bulk_write"""
+        mock_collection = MagicMock()
+        doc_db_client = DocumentDbSSHClient(credentials=self.credentials)
+        doc_db_client._client = MagicMock(
+            __getitem__=MagicMock(
+                return_value=MagicMock(
+                    __getitem__=MagicMock(return_value=mock_collection)
+                )
+            )
+        )
+        records = [{"_id": f"abc-{id_num}"} for id_num in range(0, 3)]
+        results = doc_db_client.upsert_list_of_docdb_records(
+            records, batch_size=2
+        )
+        self.assertEqual(2, len(results))
+        mock_collection.bulk_write.assert_has_calls(
+            [
+                call(
+                    [
+                        UpdateOne(
+                            {"_id": "abc-0"}, {"$set": records[0]}, True
+                        ),
+                        UpdateOne(
+                            {"_id": "abc-1"}, {"$set": records[1]}, True
+                        ),
+                    ],
+                    ordered=False,
+                ),
+                call(
+                    [UpdateOne({"_id": "abc-2"}, {"$set": records[2]}, True)],
+                    ordered=False,
+                ),
+            ]
+        )
+        self.assertEqual([], doc_db_client.upsert_list_of_docdb_records([]))
+
+    def test_upsert_list_of_docdb_records_invalid_corrupt(self):
+        """Tests that invalid or corrupt records are not upserted"""
+        mock_mongo_client = MagicMock()
+        doc_db_client = DocumentDbSSHClient(credentials=self.credentials)
+        doc_db_client._client = mock_mongo_client
+        with self.assertRaises(ValueError) as e:
+            doc_db_client.upsert_list_of_docdb_records(
+                [{"_id": "abc-123"}, {"id": "abc-125"}]
+            )
+        self.assertEqual(
+            "A record does not have an _id field.", str(e.exception)
+        )
+        with self.assertRaises(ValueError) as e:
+            doc_db_client.upsert_list_of_docdb_records(
+                [{"_id": "abc-123"}, {"_id": "abc-125", "name.corrupt": "a"}]
+            )
+        self.assertEqual(
+            "A record is corrupt and cannot be upserted.", str(e.exception)
+        )
+        mock_mongo_client.__getitem__.assert_not_called()
+
+    def test_find_many_by_ids(self):
+        """Tests finding records by ids in batches"""
+        mock_collection = MagicMock()
+        mock_collection.find.side_effect = [
+            [{"_id": "abc-123"}, {"_id": "def-456"}],
+            [],
+        ]
+        doc_db_client = DocumentDbSSHClient(credentials=self.credentials)
+        doc_db_client._client = MagicMock(
+            __getitem__=MagicMock(
+                return_value=MagicMock(
+                    __getitem__=MagicMock(return_value=mock_collection)
+                )
+            )
+        )
+        records = doc_db_client.find_many_by_ids(
+            ["abc-123", "def-456", "ghi-789"],
+            projection={"name": 1},
+            batch_size=2,
+        )
+        self.assertEqual(
+            {"abc-123": {"_id": "abc-123"}, "def-456": {"_id": "def-456"}},
+            records,
+        )
+        mock_collection.find.assert_has_calls(
+            [
+                call({"_id": {"$in": ["abc-123", "def-456"]}}, {"name": 1}),
+                call({"_id": {"$in": ["ghi-789"]}}, {"name": 1}),
+            ]
+        )
+
+    @patch("aind_data_access_api.document_db_ssh.SSHTunnelForwarder")
+    @patch("aind_data_access_api.document_db_ssh.MongoClient")
+    @patch("logging.info")
+    def test_get_shared_client(
+        self,
+        mock_log_info: MagicMock,
+        mock_create_mongo_client: MagicMock,
+        mock_create_ssh_tunnel: MagicMock,
+    ):
+        """Tests that a shared client reuses one tunnel until last close"""
+        mock_ssh_tunnel = MagicMock(is_active=False)
+        mock_mongo_client = MagicMock(
+            server_info=MagicMock(return_value=self.example_server_info),
+        )
+        mock_create_ssh_tunnel.return_value = mock_ssh_tunnel
+        mock_create_mongo_client.return_value = mock_mongo_client
+
+        client1 = get_shared_client(self.credentials)
+        with get_shared_client(self.credentials) as client2:
+            self.assertIs(client1, client2)
+        mock_create_ssh_tunnel.assert_called_once()
+        mock_ssh_tunnel.start.assert_called_once()
+        mock_ssh_tunnel.stop.assert_not_called()
+        client1.close()
+        mock_ssh_tunnel.stop.assert_called_once()
+        mock_mongo_client.close.assert_called_once()
+        # A new tunnel is opened once the shared client has been closed
+        client3 = get_shared_client(self.credentials)
+        self.assertIsNot(client1, client3)
+        client3.close()
+        self.assertEqual(2, mock_create_ssh_tunnel.call_count)
+
+    @patch("aind_data_access_api.document_db_ssh.SSHTunnelForwarder")
+    @patch("aind_data_access_api.document_db_ssh.MongoClient")
+    @patch("logging.info")
+    def test_start_failure(
+        self,
+        mock_log_info: MagicMock,
+        mock_create_mongo_client: MagicMock,
+        mock_create_ssh_tunnel: MagicMock,
+    ):
+        """Tests that a failed start stops the tunnel and leaves the client
+        unstarted, so that it can be started again"""
+        mock_ssh_tunnel = MagicMock(is_active=False)
+        mock_create_ssh_tunnel.return_value = mock_ssh_tunnel
+        mock_mongo_client = MagicMock()
+        mock_mongo_client.server_info.side_effect = [
+            ConnectionError("handshake failed"),
+            self.example_server_info,
+        ]
+        mock_create_mongo_client.side_effect = [
+            ValueError("bad options"),
+            mock_mongo_client,
+            mock_mongo_client,
+        ]
+        doc_db_client = DocumentDbSSHClient(credentials=self.credentials)
+
+        with self.assertRaises(ValueError):
+            doc_db_client.start()
+        self.assertEqual(1, mock_ssh_tunnel.stop.call_count)
+        self.assertIsNone(doc_db_client._client)
+        self.assertIsNone(doc_db_client._ssh_server)
+
+        with self.assertRaises(ConnectionError):
+            doc_db_client.start()
+        self.assertEqual(2, mock_ssh_tunnel.stop.call_count)
+        mock_mongo_client.close.assert_called_once()
+        self.assertIsNone(doc_db_client._client)
+        self.assertIsNone(doc_db_client._ssh_server)
+
+        doc_db_client.start()
+        self.assertIs(mock_mongo_client, doc_db_client._client)
+        self.assertIs(mock_ssh_tunnel, doc_db_client._ssh_server)
+        mock_log_info.assert_called_with(
+            "Connected to doc_db_host:27017 as doc_db_username"
+        )
+
+    @patch("aind_data_access_api.document_db_ssh.SSHTunnelForwarder")
+    @patch("aind_data_access_api.document_db_ssh.MongoClient")
+    @patch("logging.info")
+    def test_get_shared_client_start_outside_lock(
+        self,
+        mock_log_info: MagicMock,
+        mock_create_mongo_client: MagicMock,
+        mock_create_ssh_tunnel: MagicMock,
+    ):
+        """Tests that a shared client is started without holding the
+        registry lock, and is released if it fails to start"""
+        mock_ssh_tunnel = MagicMock(is_active=False)
+        mock_ssh_tunnel.start.side_effect = [
+            OSError("unreachable"),
+            None,
+        ]
+        mock_create_ssh_tunnel.return_value = mock_ssh_tunnel
+        mock_create_mongo_client.return_value = MagicMock(
+            server_info=MagicMock(return_value=self.example_server_info),
+        )
+        with self.assertRaises(OSError):
+            get_shared_client(self.credentials)
+        self.assertEqual({}, _SHARED_CLIENTS)
+
+        def assert_unlocked():
+            """Check that the registry lock is free while starting"""
+            self.assertFalse(_SHARED_CLIENTS_LOCK.locked())
+
+        mock_ssh_tunnel.start.side_effect = assert_unlocked
+        client = get_shared_client(self.credentials)
+        self.assertEqual(1, client._ref_count)
+        client.close()
+        self.assertEqual({}, _SHARED_CLIENTS)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,13 +1,18 @@
 """Test document_store module."""
 
+import hashlib
 import json
+import threading
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, call, patch
 
 from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 
 from aind_data_access_api.document_store import (
+    _MONGO_CLIENTS,
     Client,
     DocumentStoreCredentials,
 )
@@ -42,7 +47,9 @@ class TestClient(unittest.TestCase):
         )
 
         records = list(ds_client.retrieve_data_asset_records(query=None))
-        ds_client.close()
+        mock_find.assert_called_once_with(
+            filter=None, projection=None, batch_size=1000
+        )
         expected_response = [
             DataAssetRecord(
                 _id="abc-123",
@@ -53,6 +60,65 @@ class TestClient(unittest.TestCase):
             )
         ]
         self.assertEqual(expected_response, records)
+        unvalidated_records = list(
+            ds_client.retrieve_data_asset_records(
+                projection={"_id": 1}, validate=False
+            )
+        )
+        ds_client.close()
+        self.assertEqual(expected_response, unvalidated_records)
+
+    @patch("pymongo.collection.Collection.find")
+    def test_scan_field(self, mock_find: MagicMock):
+        """Tests that a single field is scanned from the records."""
+        mock_find.return_value = [
+            {"subject": {"subject_id": "00000"}},
+            {"subject": {}},
+            {"subject": None},
+            {},
+        ]
+        ds_client = Client(
+            credentials=DocumentStoreCredentials(
+                username="user",
+                password="password",
+                host="localhost",
+                database="db",
+            ),
+            collection_name="coll",
+        )
+        values = list(
+            ds_client.scan_field(
+                "subject.subject_id", query={"a": 1}, batch_size=10
+            )
+        )
+        ds_client.close()
+        mock_find.assert_called_once_with(
+            filter={"a": 1},
+            projection={"subject.subject_id": 1, "_id": 0},
+            batch_size=10,
+        )
+        self.assertEqual(["00000", None, None, None], values)
+
+    @patch("pymongo.collection.Collection.find")
+    def test_scan_field_id(self, mock_find: MagicMock):
+        """Tests that scanning _id does not exclude _id from the
+        projection."""
+        mock_find.return_value = [{"_id": "abc-123"}, {"_id": "abc-125"}]
+        ds_client = Client(
+            credentials=DocumentStoreCredentials(
+                username="user",
+                password="password",
+                host="localhost",
+                database="db",
+            ),
+            collection_name="coll",
+        )
+        values = list(ds_client.scan_field("_id"))
+        ds_client.close()
+        mock_find.assert_called_once_with(
+            filter=None, projection={"_id": 1}, batch_size=1000
+        )
+        self.assertEqual(["abc-123", "abc-125"], values)
 
     @patch("pymongo.collection.Collection.update_one")
     @patch("logging.info")
@@ -128,9 +194,13 @@ class TestClient(unittest.TestCase):
             ),
         ]
 
-        mock_bulk_write.return_value = "Documents Upserted"
+        mock_bulk_write.return_value = MagicMock(
+            upserted_count=1, modified_count=0
+        )
 
-        ds_client.upsert_list_of_records(data_asset_records)
+        ds_client.upsert_list_of_records(
+            (record for record in data_asset_records), batch_size=1
+        )
         ds_client.close()
 
         operations = [
@@ -168,9 +238,165 @@ class TestClient(unittest.TestCase):
             ),
         ]
 
-        mock_bulk_write.assert_called_once_with(operations)
+        mock_bulk_write.assert_has_calls(
+            [
+                call([operations[0]], ordered=False),
+                call([operations[1]], ordered=False),
+            ],
+            any_order=True,
+        )
+
+        mock_log_info.assert_called_once_with(
+            "Upserted %d and modified %d records.", 2, 0
+        )
+
+    @patch(
+        "aind_data_access_api.document_store.ThreadPoolExecutor",
+        wraps=ThreadPoolExecutor,
+    )
+    @patch("pymongo.collection.Collection.bulk_write")
+    @patch("logging.info")
+    def test_upsert_list_of_records_max_workers(
+        self,
+        mock_log_info: MagicMock,
+        mock_bulk_write: MagicMock,
+        mock_executor: MagicMock,
+    ) -> None:
+        """Tests that max_workers is capped at the pool size and that no
+        more than max_workers batches are read ahead of the writes."""
+        ds_client = Client(
+            credentials=DocumentStoreCredentials(
+                username="user",
+                password="password",
+                host="localhost",
+                database="db",
+            ),
+            collection_name="coll",
+        )
+        consumed = []
+        started = []
+        lock = threading.Lock()
+
+        def records():
+            """Yield records, keeping track of how many have been read."""
+            for i in range(10):
+                consumed.append(i)
+                yield DataAssetRecord(
+                    _id=f"abc-{i}",
+                    _name=f"modal_0000{i}_2000-10-10_10-10-10",
+                    _created=datetime(2000, 10, 10, 10, 10, 10),
+                    _location="some_url",
+                )
+
+        def bulk_write(chunk, ordered):
+            """Check that the reader has not run ahead of the writes."""
+            with lock:
+                started.append(chunk)
+                self.assertLessEqual(len(consumed), len(started) + 2)
+            return MagicMock(upserted_count=len(chunk), modified_count=0)
+
+        mock_bulk_write.side_effect = bulk_write
+        ds_client.upsert_list_of_records([], max_workers=1000)
+        ds_client.upsert_list_of_records(
+            records(), batch_size=1, max_workers=2
+        )
+        ds_client.close()
+        mock_executor.assert_has_calls(
+            [call(max_workers=100), call(max_workers=2)], any_order=True
+        )
+        self.assertEqual(10, mock_bulk_write.call_count)
+        mock_log_info.assert_called_with(
+            "Upserted %d and modified %d records.", 10, 0
+        )
+
+    @patch("aind_data_access_api.document_store.ThreadPoolExecutor")
+    @patch("pymongo.collection.Collection.bulk_write")
+    def test_upsert_list_of_records_ordered_error(
+        self, mock_bulk_write: MagicMock, mock_executor: MagicMock
+    ) -> None:
+        """Tests that ordered upserts are sent one batch at a time and stop
+        at the first batch that fails."""
+        ds_client = Client(
+            credentials=DocumentStoreCredentials(
+                username="user",
+                password="password",
+                host="localhost",
+                database="db",
+            ),
+            collection_name="coll",
+        )
+        data_asset_records = [
+            DataAssetRecord(
+                _id=f"abc-12{i}",
+                _name=f"modal_0000{i}_2000-10-10_10-10-10",
+                _created=datetime(2000, 10, 10, 10, 10, 10),
+                _location="some_url",
+            )
+            for i in range(3)
+        ]
+        mock_bulk_write.side_effect = [
+            MagicMock(upserted_count=1, modified_count=0),
+            BulkWriteError({"writeErrors": []}),
+            MagicMock(upserted_count=1, modified_count=0),
+        ]
+        with self.assertRaises(BulkWriteError):
+            ds_client.upsert_list_of_records(
+                data_asset_records, batch_size=1, ordered=True
+            )
+        ds_client.close()
+        self.assertEqual(2, mock_bulk_write.call_count)
+        mock_executor.assert_not_called()
+
+    @patch("pymongo.collection.Collection.insert_many")
+    @patch("logging.info")
+    def test_insert_many_records(
+        self, mock_log_info: MagicMock, mock_insert_many: MagicMock
+    ) -> None:
+        """Tests inserting a list of new records."""
+        ds_client = Client(
+            credentials=DocumentStoreCredentials(
+                username="user",
+                password="password",
+                host="localhost",
+                database="db",
+            ),
+            collection_name="coll",
+        )
+        data_asset_records = [
+            DataAssetRecord(
+                _id=f"abc-12{i}",
+                _name=f"modal_0000{i}_2000-10-10_10-10-10",
+                _created=datetime(2000, 10, 10, 10, 10, 10),
+                _location="some_url",
+            )
+            for i in range(3)
+        ]
+        mock_insert_many.side_effect = [
+            MagicMock(inserted_ids=["abc-120", "abc-121"]),
+            MagicMock(inserted_ids=["abc-122"]),
+        ]
+
+        ds_client.insert_many_records(
+            (record for record in data_asset_records), batch_size=2
+        )
+        ds_client.close()
 
-        mock_log_info.assert_called_once_with("Documents Upserted")
+        documents = [
+            {
+                "_id": f"abc-12{i}",
+                "_name": f"modal_0000{i}_2000-10-10_10-10-10",
+                "_created": "2000-10-10T10:10:10",
+                "_location": "some_url",
+            }
+            for i in range(3)
+        ]
+        mock_insert_many.assert_has_calls(
+            [
+                call(documents[:2], ordered=False),
+                call(documents[2:], ordered=False),
+            ]
+        )
+        mock_log_info.assert_called_once_with("Inserted %d records.", 3)
 
     def test_retry_writes(self):
         """Tests that the retryWrites option can be set."""
@@ -201,6 +427,58 @@ class TestClient(unittest.TestCase):
             ds_client2._client._MongoClient__options._options["retryWrites"]
         )
 
+    def test_collection_is_cached(self):
+        """Tests that the collection is cached until the client is closed."""
+        ds_client = Client(
+            credentials=DocumentStoreCredentials(
+                username="user",
+                password="password",
+                host="localhost",
+                database="db",
+            ),
+            collection_name="coll",
+        )
+        collection = ds_client.collection
+        self.assertIs(collection, ds_client.collection)
+        ds_client.collection_name = "other_coll"
+        self.assertEqual("other_coll", ds_client.collection.name)
+        ds_client.close()
+        self.assertNotIn("collection", ds_client.__dict__)
+
+    def test_shared_mongo_client(self):
+        """Tests that clients with the same settings share a MongoClient,
+        which is closed when the last of them is closed."""
+        credentials = DocumentStoreCredentials(
+            username="shared_user",
+            password="password",
+            host="localhost",
+            database="db",
+        )
+        ds_client1 = Client(credentials=credentials, collection_name="a")
+        ds_client2 = Client(credentials=credentials, collection_name="b")
+        ds_client3 = Client(
+            credentials=credentials, collection_name="a", retry_writes=False
+        )
+        shared_client = ds_client1._client
+        self.assertIs(shared_client, ds_client2._client)
+        self.assertIsNot(shared_client, ds_client3._client)
+        key_strings = [
+            k for key in _MONGO_CLIENTS for k in key if isinstance(k, str)
+        ]
+        self.assertNotIn("password", key_strings)
+        self.assertNotIn(hashlib.sha256(b"password").hexdigest(), key_strings)
+        ds_client3.close()
+        with patch.object(shared_client, "close") as mock_close:
+            ds_client1.close()
+            ds_client1.close()
+            self.assertIsNone(ds_client1._client)
+            mock_close.assert_not_called()
+            ds_client2.close()
+            mock_close.assert_called_once_with()
+        ds_client4 = Client(credentials=credentials, collection_name="a")
+        self.assertIsNot(shared_client, ds_client4._client)
+        ds_client4.close()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -57,6 +57,7 @@ class TestUtilDataSchema(unittest.TestCase):
 
         qc = get_quality_control_by_name(client, name="123")
 
+        client.retrieve_docdb_records.assert_called_once()
         self.assertEqual(
             qc,
             QualityControl.model_validate_json(
@@ -115,22 +116,44 @@ class TestUtilDataSchema(unittest.TestCase):
             ValueError, get_quality_control_by_name, client, name="123"
         )
 
+        client.retrieve_docdb_records.return_value = [{"_id": "abcd"}]
+
+        self.assertRaises(
+            ValueError, get_quality_control_by_name, client, name="123"
+        )
+
     def test_get_qc_no_qc(self):
         """Test that a value error is raised when no qc exists."""
         # Get json dict from test file
         client = MagicMock()
-        client.retrieve_docdb_records.return_value = [{"_id": "abcd"}]
+        client.retrieve_docdb_records.return_value = []
 
         self.assertRaises(
             ValueError, get_quality_control_by_id, client, _id="123"
         )
+        client.retrieve_docdb_records.assert_called_once_with(
+            filter_query={
+                "_id": "123",
+                "quality_control": {"$nin": [None, {}]},
+            },
+            projection={"quality_control": 1},
+            limit=1,
+        )
 
+    def test_get_qc_empty_qc(self):
+        """Test that a value error is raised when qc is an empty dict, even
+        if invalid qc is allowed."""
+        client = MagicMock()
         client.retrieve_docdb_records.return_value = [
-            {"_id": "abcd", "quality_control": None}
+            {"_id": "abcd", "quality_control": {}}
         ]
 
         self.assertRaises(
-            ValueError, get_quality_control_by_id, client, _id="123"
+            ValueError,
+            get_quality_control_by_id,
+            client,
+            _id="123",
+            allow_invalid=True,
         )
 
 
@@ -1,13 +1,15 @@
 """Tests methods in util.docdb module"""
 
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 from aind_data_access_api.helpers.docdb import (
     get_record_by_id,
     get_id_from_name,
     get_projection_by_id,
     get_field_by_id,
+    get_field_by_name,
+    get_required_field_by_id,
 )
 
 
@@ -21,6 +23,24 @@ class TestUtilDocDB(unittest.TestCase):
             {"_id": "abcd", "name": "123"}
         ]
         self.assertEqual("abcd", get_id_from_name(client, name="123"))
+        client.retrieve_docdb_records.assert_called_once_with(
+            filter_query={"name": "123"}, projection={"_id": 1}, limit=2
+        )
+
+    @patch("logging.warning")
+    def test_get_id_from_name_shared(self, mock_warning: MagicMock):
+        """Tests get_id_from_name when several records share the name"""
+        client = MagicMock()
+        client.retrieve_docdb_records.return_value = [
+            {"_id": "abcd"},
+            {"_id": "efgh"},
+        ]
+        self.assertEqual("abcd", get_id_from_name(client, name="123"))
+        mock_warning.assert_called_once_with(
+            "Multiple records share the name %s, "
+            "only the first record will be returned.",
+            "123",
+        )
 
     def test_get_record_from_docdb(self):
         """Tests get_record_from_docdb"""
@@ -45,6 +65,13 @@ class TestUtilDocDB(unittest.TestCase):
         )
         self.assertEqual({"quality_control": {"a": 1}}, record)
 
+        # test the empty case
+        client.retrieve_docdb_records.return_value = []
+        record = get_projection_by_id(
+            client, _id="abcd", projection={"quality_control": 1}
+        )
+        self.assertIsNone(record)
+
     def test_get_field_from_docdb(self):
         """Tests get_field_from_docdb"""
         client = MagicMock()
@@ -53,3 +80,66 @@ class TestUtilDocDB(unittest.TestCase):
         ]
         field = get_field_by_id(client, _id="abcd", field="quality_control")
         self.assertEqual({"quality_control": {"a": 1}}, field)
+
+    def test_get_required_field_by_id(self):
+        """Tests get_required_field_by_id"""
+        client = MagicMock()
+        client.retrieve_docdb_records.return_value = [
+            {"quality_control": {"a": 1}}
+        ]
+        field = get_required_field_by_id(
+            client, _id="abcd", field="quality_control"
+        )
+        self.assertEqual({"quality_control": {"a": 1}}, field)
+        client.retrieve_docdb_records.assert_called_once_with(
+            filter_query={
+                "_id": "abcd",
+                "quality_control": {"$nin": [None, {}]},
+            },
+            projection={"quality_control": 1},
+            limit=1,
+        )
+
+        # test the empty case
+        client.retrieve_docdb_records.return_value = []
+        self.assertIsNone(
+            get_required_field_by_id(
+                client, _id="abcd", field="quality_control"
+            )
+        )
+
+    def test_get_field_by_name(self):
+        """Tests get_field_by_name"""
+        client = MagicMock()
+        client.retrieve_docdb_records.return_value = [
+            {"_id": "abcd", "quality_control": {"a": 1}}
+        ]
+        field = get_field_by_name(client, name="123", field="quality_control")
+        self.assertEqual({"_id": "abcd", "quality_control": {"a": 1}}, field)
+        client.retrieve_docdb_records.assert_called_once_with(
+            filter_query={"name": "123"},
+            projection={"quality_control": 1, "_id": 1},
+            limit=2,
+        )
+
+        # test the empty case
+        client.retrieve_docdb_records.return_value = []
+        self.assertIsNone(
+            get_field_by_name(client, name="123", field="quality_control")
+        )
+
+    @patch("logging.warning")
+    def test_get_field_by_name_shared(self, mock_warning: MagicMock):
+        """Tests get_field_by_name when several records share the name"""
+        client = MagicMock()
+        client.retrieve_docdb_records.return_value = [
+            {"_id": "abcd", "quality_control": {"a": 1}},
+            {"_id": "efgh", "quality_control": {"a": 2}},
+        ]
+        field = get_field_by_name(client, name="123", field="quality_control")
+        self.assertEqual({"_id": "abcd", "quality_control": {"a": 1}}, field)
+        mock_warning.assert_called_once_with(
+            "Multiple records share the name %s, "
+            "only the first record will be returned.",
+            "123",
+        )
@@ -1,10 +1,13 @@
 """Test rds_tables module."""
 
+import sqlite3
 import unittest
+from datetime import date
 from unittest.mock import MagicMock, call, patch
 
 import pandas as pd
-from sqlalchemy import text
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import StaticPool
 
 from aind_data_access_api.rds_tables import Client, RDSCredentials
 
@@ -142,6 +145,81 @@ class TestClient(unittest.TestCase):
             index=False,
         )
 
+    def test_write_df_use_copy(self):
+        """Tests that append and overwrite can load rows with COPY, and that
+        the table is created with the types inferred from the full
+        dataframe."""
+        rds_client = Client(
+            credentials=RDSCredentials(
+                username="user",
+                password="password",
+                host="localhost",
+                database="db",
+            ),
+        )
+        copy_calls = []
+
+        class CopyCursor(sqlite3.Cursor):
+            """sqlite3 cursor that records copy_expert calls."""
+
+            def __enter__(self):
+                """Use the cursor as a context manager like psycopg2."""
+                return self
+
+            def __exit__(self, *args):
+                """Close the cursor on exit."""
+                self.close()
+
+            def copy_expert(self, sql, file):
+                """Record the COPY statement and the rows sent with it."""
+                copy_calls.append((sql, file.getvalue()))
+
+        class CopyConnection(sqlite3.Connection):
+            """sqlite3 connection that hands out CopyCursors."""
+
+            def cursor(self, factory=CopyCursor):
+                """Create a CopyCursor by default."""
+                return super().cursor(factory)
+
+        sqlite_engine = create_engine(
+            "sqlite://",
+            creator=lambda: sqlite3.connect(
+                ":memory:", factory=CopyConnection
+            ),
+            poolclass=StaticPool,
+        )
+        df1 = pd.DataFrame(
+            [["a", 1, date(2024, 1, 1), True], [None, 2, None, None]],
+            columns=["foo", "Bar", "day", "flag"],
+        )
+
+        with patch.object(Client, "_engine", sqlite_engine):
+            rds_client.append_df_to_table(df1, "some_table", use_copy=True)
+            rds_client.overwrite_table_with_df(
+                df1, "Other_Table", use_copy=True
+            )
+        columns = inspect(sqlite_engine).get_columns("Other_Table")
+
+        self.assertEqual(
+            ["TEXT", "BIGINT", "DATE", "BOOLEAN"],
+            [str(c["type"]) for c in columns],
+        )
+        self.assertEqual(
+            [
+                (
+                    'COPY some_table (foo, "Bar", day, flag) FROM STDIN '
+                    "WITH (FORMAT CSV, NULL '\\N')",
+                    "a,1,2024-01-01,True\n\\N,2,\\N,\\N\n",
+                ),
+                (
+                    'COPY "Other_Table" (foo, "Bar", day, flag) FROM STDIN '
+                    "WITH (FORMAT CSV, NULL '\\N')",
+                    "a,1,2024-01-01,True\n\\N,2,\\N,\\N\n",
+                ),
+            ],
+            copy_calls,
+        )
+
     @patch("sqlalchemy.engine.Engine.begin")
     def test_execute_query(self, mock_engine: MagicMock):
         """Tests that a sql query gets executed."""
@@ -160,6 +238,21 @@ class TestClient(unittest.TestCase):
         input_text = mock_exec.mock_calls[0].args[0].text
         self.assertEqual('SELECT * FROM "some_table"', input_text)
 
+    def test_engine_is_cached(self):
+        """Tests that the engine is created once per client."""
+        rds_client = Client(
+            credentials=RDSCredentials(
+                username="user",
+                password="password",
+                host="localhost",
+                database="db",
+            ),
+        )
+        engine = rds_client._engine
+        self.assertIs(engine, rds_client._engine)
+        self.assertTrue(engine.pool._pre_ping)
+        self.assertEqual(3600, engine.pool._recycle)
+
 
 if __name__ == "__main__":
     unittest.main()
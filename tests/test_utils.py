@@ -180,6 +180,9 @@ class TestUtils(unittest.TestCase):
         ]
         actual_results = list(pages)
         self.assertEqual(expected_results, actual_results)
+        mock_collection.find.assert_called_once_with(
+            filter={}, projection={}, batch_size=2
+        )
 
     @patch("pymongo.MongoClient")
     def test_build_docdb_location_to_id_map(